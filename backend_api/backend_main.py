@@ -5,10 +5,11 @@ AI 时间管理系统 - 后端 API 服务（简化版）
 不修改现有 AI 代码，通过接口方式提供服务。
 
 安装依赖：
-pip install fastapi uvicorn pydantic
+pip install fastapi uvicorn pydantic orjson
 
 启动服务：
-uvicorn backend_main:app --host 0.0.0.0 --port 8000 --reload
+uvicorn backend_main:app --host 0.0.0.0 --port 8000
+（uvicorn 默认在已安装时使用 uvloop 和 httptools，Windows 下自动回退到 asyncio 和 h11）
 
 作者：Fuxuan
 日期：2025-07-16
@@ -19,8 +20,7 @@ import os
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import asyncio
-import json
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
@@ -29,13 +29,15 @@ sys.path.insert(0, str(project_root))
 try:
     from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
     from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.responses import JSONResponse
-    from pydantic import BaseModel
+    from fastapi.middleware.gzip import GZipMiddleware
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from pydantic import BaseModel, field_validator
+    import anyio.to_thread
     import uvicorn
 
     FASTAPI_AVAILABLE = True
 except ImportError:
-    print("❌ FastAPI 未安装，请运行: pip install fastapi uvicorn pydantic")
+    print("❌ FastAPI 未安装，请运行: pip install fastapi uvicorn pydantic orjson")
     FASTAPI_AVAILABLE = False
     sys.exit(1)
 
@@ -43,6 +45,15 @@ except ImportError:
 from time_planner.new_agent import NewTimeManagementAgent
 from time_planner.new_services import TimeManagementService
 from time_planner.new_models import Priority
+from backend_api.utils import (
+    ConditionalGetMiddleware,
+    now_iso,
+    parse_priority,
+    ts_refresher,
+    with_cache_headers,
+)
+from backend_api.chat_routes import router as chat_router
+from backend_api.data_routes import router as data_router
 
 # 创建 FastAPI 应用
 app = FastAPI(
@@ -51,29 +62,54 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # 配置 CORS - 解决跨域问题
+# 默认允许直接打开的本地页面（Origin 为 "null"）和 VS Code Live Server，
+# 其他前端地址通过 CORS_ORIGINS 环境变量（逗号分隔）配置
+CORS_ORIGINS = os.getenv(
+    "CORS_ORIGINS", "null,http://localhost:5500,http://127.0.0.1:5500"
+).split(",")
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 生产环境应该限制具体域名
+    allow_origins=[origin.strip() for origin in CORS_ORIGINS if origin.strip()],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["content-type", "authorization"],
+    expose_headers=[],
+    max_age=86400,
 )
 
+# 配置条件请求 - ETag 未变化时返回 304，减少轮询流量
+app.add_middleware(ConditionalGetMiddleware)
+
+# 配置 GZip 压缩 - 时间表/导出等大体积 JSON 响应，小于 1KB 的响应不压缩
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # 全局变量：AI Agent 实例
 ai_agent: Optional[NewTimeManagementAgent] = None
 time_service: Optional[TimeManagementService] = None
+_ts_task: Optional[asyncio.Task] = None
 
 
 @app.on_event("startup")
 async def startup_event():
     """应用启动时初始化 AI Agent"""
-    global ai_agent, time_service
+    global ai_agent, time_service, _ts_task
+    _ts_task = asyncio.create_task(ts_refresher())
+    # 同步接口在线程池中执行，放宽默认的 40 线程上限
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 128
+    # AI 调用使用独立线程池，避免慢请求占满共享线程池
+    # 只用一个线程：共享的 Agent 的对话历史、记忆和数据文件都不支持并发修改，AI 请求须逐个执行
+    app.state.ai_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai")
     try:
         ai_agent = NewTimeManagementAgent()
         time_service = ai_agent.time_service
+        # 路由模块通过 request.app.state 访问共享实例
+        app.state.ai_agent = ai_agent
+        app.state.time_service = time_service
         print("✅ AI Agent 初始化成功")
     except Exception as e:
         print(f"❌ AI Agent 初始化失败: {e}")
@@ -83,10 +119,14 @@ async def startup_event():
 async def shutdown_event():
     """应用关闭时清理资源"""
     global ai_agent
+    if _ts_task:
+        _ts_task.cancel()
+    app.state.ai_pool.shutdown(wait=False, cancel_futures=True)
     if ai_agent:
         try:
             # AI Agent 没有 shutdown 方法，直接设为 None
             ai_agent = None
+            app.state.ai_agent = None
             print("✅ AI Agent 已关闭")
         except:
             pass
@@ -95,24 +135,6 @@ async def shutdown_event():
 # ==================== 数据模型定义 ====================
 
 
-class ChatMessage(BaseModel):
-    """聊天消息模型"""
-
-    message: str
-    session_id: Optional[str] = "default"
-
-
-class ChatResponse(BaseModel):
-    """聊天响应模型"""
-
-    success: bool
-    message: str
-    response: str
-    tools_used: List[str] = []
-    timestamp: str
-    session_id: str
-
-
 class TaskBase(BaseModel):
     """任务基础模型"""
 
@@ -137,7 +159,13 @@ class WeeklyTaskCreate(TaskBase):
 
     week_number: int
     parent_project: Optional[str] = None
-    priority: str = "medium"
+    priority: Priority = Priority.MEDIUM
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _parse_priority(cls, value: Any) -> Any:
+        """解析时直接转换为 Priority 枚举（忽略大小写），非法值返回 422"""
+        return parse_priority(value)
 
 
 class TaskUpdate(BaseModel):
@@ -173,70 +201,24 @@ async def root():
 @app.get("/health")
 async def health():
     """健康检查端点"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "ai_agent_status": ai_agent is not None,
-        "time_service_status": time_service is not None,
-    }
-
-
-# ==================== AI 聊天接口 ====================
-
-
-@app.post("/api/chat/message", response_model=ChatResponse)
-async def send_message(chat_message: ChatMessage):
-    """向 AI 发送消息并获取响应"""
-    if not ai_agent:
-        raise HTTPException(status_code=500, detail="AI Agent 未初始化")
-
-    try:
-        # 调用 AI Agent 处理用户请求
-        response = await asyncio.create_task(
-            asyncio.to_thread(ai_agent.process_user_request, chat_message.message)
-        )
-
-        # 获取使用的工具列表（从 AI Agent 状态中获取）
-        tools_used = getattr(ai_agent, "last_tools_used", [])
-
-        return ChatResponse(
-            success=True,
-            message=chat_message.message,
-            response=response,
-            tools_used=tools_used,
-            timestamp=datetime.now().isoformat(),
-            session_id=chat_message.session_id,
-        )
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI 处理失败: {str(e)}")
-
-
-@app.get("/api/chat/history")
-async def get_chat_history(session_id: str = "default", limit: int = 50):
-    """获取聊天历史记录"""
-    if not ai_agent:
-        raise HTTPException(status_code=500, detail="AI Agent 未初始化")
-
-    try:
-        # 从 AI Agent 的内存中获取历史记录
-        memory = ai_agent.memory
-        if hasattr(memory, "get_conversation_history"):
-            history = memory.get_conversation_history(session_id, limit)
-            return {"success": True, "history": history}
-        else:
-            # 如果没有实现历史记录功能，返回空列表
-            return {"success": True, "history": []}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取历史记录失败: {str(e)}")
+    return with_cache_headers(
+        ORJSONResponse(
+            {
+                "status": "healthy",
+                "timestamp": now_iso(),
+                "ai_agent_status": ai_agent is not None,
+                "time_service_status": time_service is not None,
+            }
+        ),
+        max_age=1,
+    )
 
 
 # ==================== 任务管理接口 ====================
 
 
 @app.post("/api/tasks/daily")
-async def create_daily_task(task_data: DailyTaskCreate):
+def create_daily_task(task_data: DailyTaskCreate):
     """创建日任务"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
@@ -255,11 +237,14 @@ async def create_daily_task(task_data: DailyTaskCreate):
         )
 
         if success:
-            return {
-                "success": True,
-                "message": f"日任务 '{task_data.task_name}' 创建成功",
-                "task_data": task_data.dict(),
-            }
+            # 请求体已通过校验，直接输出字段，跳过二次序列化校验
+            return ORJSONResponse(
+                {
+                    "success": True,
+                    "message": f"日任务 '{task_data.task_name}' 创建成功",
+                    "task_data": task_data.__dict__,
+                }
+            )
         else:
             raise HTTPException(status_code=400, detail="日任务创建失败")
 
@@ -268,7 +253,7 @@ async def create_daily_task(task_data: DailyTaskCreate):
 
 
 @app.get("/api/tasks/daily")
-async def get_daily_tasks(
+def get_daily_tasks(
     date_str: str = Query(..., description="日期字符串 (YYYY-MM-DD)")
 ):
     """获取指定日期的日任务"""
@@ -280,7 +265,7 @@ async def get_daily_tasks(
         return {
             "success": True,
             "date": date_str,
-            "tasks": [task.dict() for task in tasks],
+            "tasks": [task.__dict__ for task in tasks],
             "count": len(tasks),
         }
 
@@ -289,34 +274,30 @@ async def get_daily_tasks(
 
 
 @app.post("/api/tasks/weekly")
-async def create_weekly_task(task_data: WeeklyTaskCreate):
+def create_weekly_task(task_data: WeeklyTaskCreate):
     """创建周任务"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
     try:
-        # 转换 priority 字符串为 Priority 枚举
-        priority_map = {
-            "low": Priority.LOW,
-            "medium": Priority.MEDIUM,
-            "high": Priority.HIGH,
-        }
-        priority_enum = priority_map.get(task_data.priority.lower(), Priority.MEDIUM)
-
+        # priority 在请求解析时已转换为 Priority 枚举
         success = time_service.add_weekly_task(
             week_number=task_data.week_number,
             task_name=task_data.task_name,
             description=task_data.description,
             parent_project=task_data.parent_project,
-            priority=priority_enum,
+            priority=task_data.priority,
         )
 
         if success:
-            return {
-                "success": True,
-                "message": f"周任务 '{task_data.task_name}' 创建成功",
-                "task_data": task_data.dict(),
-            }
+            # 请求体已通过校验，直接输出字段，跳过二次序列化校验
+            return ORJSONResponse(
+                {
+                    "success": True,
+                    "message": f"周任务 '{task_data.task_name}' 创建成功",
+                    "task_data": task_data.__dict__,
+                }
+            )
         else:
             raise HTTPException(status_code=400, detail="周任务创建失败")
 
@@ -325,7 +306,7 @@ async def create_weekly_task(task_data: WeeklyTaskCreate):
 
 
 @app.get("/api/tasks/weekly")
-async def get_weekly_tasks(week_number: int = Query(..., description="周数")):
+def get_weekly_tasks(week_number: int = Query(..., description="周数")):
     """获取指定周的周任务"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
@@ -335,7 +316,7 @@ async def get_weekly_tasks(week_number: int = Query(..., description="周数")):
         return {
             "success": True,
             "week_number": week_number,
-            "tasks": [task.dict() for task in tasks],
+            "tasks": [task.__dict__ for task in tasks],
             "count": len(tasks),
         }
 
@@ -344,7 +325,7 @@ async def get_weekly_tasks(week_number: int = Query(..., description="周数")):
 
 
 @app.get("/api/tasks/statistics")
-async def get_task_statistics():
+def get_task_statistics():
     """获取任务统计信息"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
@@ -354,87 +335,18 @@ async def get_task_statistics():
         return {
             "success": True,
             "statistics": stats,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取统计信息失败: {str(e)}")
 
 
-# ==================== 数据管理接口 ====================
-
-
-@app.get("/api/data/schedules/latest")
-async def get_latest_schedule():
-    """获取最新的 AI 生成的时间表"""
-    try:
-        # 检查 latest_schedule.json 文件
-        latest_file = Path("latest_schedule.json")
-        if latest_file.exists():
-            with open(latest_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return {"success": True, "schedule": data, "source": "latest_schedule.json"}
-
-        # 如果没有最新文件，检查 ai_generated_schedules 目录
-        schedules_dir = Path("ai_generated_schedules")
-        if schedules_dir.exists():
-            schedule_files = list(schedules_dir.glob("*.json"))
-            if schedule_files:
-                # 获取最新的文件
-                latest_file = max(schedule_files, key=lambda f: f.stat().st_mtime)
-                with open(latest_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return {
-                    "success": True,
-                    "schedule": data,
-                    "source": str(latest_file.name),
-                }
-
-        # 如果都没有，返回空
-        return {"success": True, "schedule": None, "message": "暂无AI生成的时间表"}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取最新时间表失败: {str(e)}")
-
-
-@app.post("/api/data/export/frontend")
-async def export_for_frontend():
-    """为前端导出完整数据"""
-    if not ai_agent:
-        raise HTTPException(status_code=500, detail="AI Agent 未初始化")
-
-    try:
-        # 使用 AI Agent 的前端导出功能
-        export_data = ai_agent.export_schedule_for_frontend()
-
-        return {
-            "success": True,
-            "data": export_data,
-            "export_time": datetime.now().isoformat(),
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"前端数据导出失败: {str(e)}")
-
-
-@app.get("/api/data/time-info")
-async def get_time_info():
-    """获取当前时间信息"""
-    try:
-        from time_planner.new_models import TimeUtils
-
-        # 获取详细时间信息
-        time_info = {
-            "current_time": TimeUtils.get_current_time_info(),
-            "detailed_time": TimeUtils.get_detailed_time_info(),
-            "week_progress": TimeUtils.get_week_progress(),
-            "timestamp": datetime.now().isoformat(),
-        }
+# ==================== 聊天与数据管理接口 ====================
 
-        return {"success": True, "time_info": time_info}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取时间信息失败: {str(e)}")
+# 聊天与数据管理接口由独立的路由模块提供，避免重复定义
+app.include_router(chat_router)
+app.include_router(data_router)
 
 
 if __name__ == "__main__":
@@ -443,8 +355,19 @@ if __name__ == "__main__":
         print("📖 API 文档: http://localhost:8000/docs")
         print("🔍 ReDoc 文档: http://localhost:8000/redoc")
 
+        # 开发时设置 UVICORN_RELOAD=1 开启热重载；生产环境可通过 API_WORKERS 指定进程数
+        # 注意：AI 代理与对话记忆保存在进程内，多进程时各进程状态互不共享
+        reload = os.getenv("UVICORN_RELOAD") == "1"
         uvicorn.run(
-            "backend_main:app", host="0.0.0.0", port=8000, reload=True, log_level="info"
+            "backend_main:app",
+            host="0.0.0.0",
+            port=8000,
+            # auto：已安装 uvloop/httptools 时优先使用，Windows 等平台上自动回退
+            loop="auto",
+            http="auto",
+            reload=reload,
+            workers=None if reload else int(os.getenv("API_WORKERS", "1")),
+            log_level="info",
         )
     else:
         print("❌ FastAPI 未安装，无法启动服务")
@@ -2,18 +2,117 @@
 AI 聊天接口实现
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from collections import defaultdict, deque
 import asyncio
-from datetime import datetime
+import os
+import orjson
 
-from .main import ChatMessage, ChatResponse, ai_agent
+from time_planner.new_agent import TOOLS_USED
+
+from .utils import get_ai_agent, now_iso
+
+try:
+    import redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
 router = APIRouter(prefix="/api/chat", tags=["AI 聊天"])
 
 
-@router.post("/message", response_model=ChatResponse)
-async def send_message(chat_message: ChatMessage):
+# ==================== 聊天历史存储 ====================
+
+# 每个会话保留的最大消息数及过期时间（秒）
+CHAT_HISTORY_MAX = 1000
+CHAT_HISTORY_TTL = 86400
+
+# 配置 REDIS_URL 且安装了 redis 时使用 Redis，否则退回到进程内存储
+_redis = (
+    redis.Redis.from_url(os.environ["REDIS_URL"])
+    if REDIS_AVAILABLE and os.getenv("REDIS_URL")
+    else None
+)
+_local_history: Dict[str, Deque[Dict[str, Any]]] = defaultdict(
+    lambda: deque(maxlen=CHAT_HISTORY_MAX)
+)
+
+
+def _history_key(session_id: str) -> str:
+    """会话历史在 Redis 中的键名"""
+    return f"chat:{session_id}"
+
+
+def _record_chat(session_id: str, message: str, response: str):
+    """记录一轮对话（最新的在前）"""
+    item = {"user": message, "assistant": response, "timestamp": now_iso()}
+    if _redis is None:
+        _local_history[session_id].appendleft(item)
+        return
+
+    key = _history_key(session_id)
+    pipe = _redis.pipeline()
+    pipe.lpush(key, orjson.dumps(item))
+    pipe.ltrim(key, 0, CHAT_HISTORY_MAX - 1)
+    pipe.expire(key, CHAT_HISTORY_TTL)
+    pipe.execute()
+
+
+def _load_history(session_id: str, limit: int) -> List[Dict[str, Any]]:
+    """读取最近 limit 轮对话，按时间先后排序"""
+    if _redis is None:
+        items = list(_local_history.get(session_id, ()))[:limit]
+    else:
+        items = [
+            orjson.loads(raw)
+            for raw in _redis.lrange(_history_key(session_id), 0, limit - 1)
+        ]
+    items.reverse()
+    return items
+
+
+def _clear_history(session_id: str):
+    """清空会话历史"""
+    if _redis is None:
+        _local_history.pop(session_id, None)
+    else:
+        _redis.delete(_history_key(session_id))
+
+
+class ChatMessage(BaseModel):
+    """聊天消息模型"""
+
+    message: str
+    session_id: Optional[str] = "default"
+
+
+class ChatResponse(BaseModel):
+    """聊天响应模型"""
+
+    success: bool
+    message: str
+    response: str
+    tools_used: List[str] = []
+    timestamp: str
+    session_id: str
+
+
+async def _process_with_tools(ai_agent: Any, message: str) -> Tuple[str, List[str]]:
+    """
+    处理用户消息并返回本次调用的工具列表
+
+    与 Agent 在同一上下文中执行，才能读取到本次请求记录的 TOOLS_USED。
+    """
+    response = await ai_agent.process_user_request(message)
+    return response, list(TOOLS_USED.get())
+
+
+@router.post("/message", responses={200: {"model": ChatResponse}})
+async def send_message(request: Request, chat_message: ChatMessage):
     """
     向 AI 发送消息并获取响应
 
@@ -26,25 +125,38 @@ async def send_message(chat_message: ChatMessage):
     Raises:
         HTTPException: 当 AI Agent 未初始化或处理失败时
     """
+    ai_agent = get_ai_agent(request)
     if not ai_agent:
         raise HTTPException(status_code=500, detail="AI Agent 未初始化")
 
     try:
         # 调用 AI Agent 处理用户请求
-        response = await asyncio.create_task(
-            asyncio.to_thread(ai_agent.process_user_request, chat_message.message)
+        # process_user_request 内部使用同步 OpenAI 客户端，放到 AI 专用线程池的独立事件循环中执行
+        loop = asyncio.get_running_loop()
+        response, tools_used = await loop.run_in_executor(
+            getattr(request.app.state, "ai_pool", None),
+            asyncio.run,
+            _process_with_tools(ai_agent, chat_message.message),
         )
 
-        # 获取使用的工具列表（从 AI Agent 状态中获取）
-        tools_used = getattr(ai_agent, "last_tools_used", [])
-
-        return ChatResponse(
-            success=True,
-            message=chat_message.message,
-            response=response,
-            tools_used=tools_used,
-            timestamp=datetime.now().isoformat(),
-            session_id=chat_message.session_id,
+        # 写入聊天历史（Redis 为网络调用，放到线程中执行）
+        if _redis is None:
+            _record_chat(chat_message.session_id, chat_message.message, response)
+        else:
+            await asyncio.to_thread(
+                _record_chat, chat_message.session_id, chat_message.message, response
+            )
+
+        # 字段均来自已校验的请求和内部结果，直接序列化，ChatResponse 仅用于接口文档
+        return ORJSONResponse(
+            {
+                "success": True,
+                "message": chat_message.message,
+                "response": response,
+                "tools_used": tools_used,
+                "timestamp": now_iso(),
+                "session_id": chat_message.session_id,
+            }
         )
 
     except Exception as e:
@@ -52,7 +164,7 @@ async def send_message(chat_message: ChatMessage):
 
 
 @router.get("/history")
-async def get_chat_history(session_id: str = "default", limit: int = 50):
+def get_chat_history(session_id: str = "default", limit: int = 50):
     """
     获取聊天历史记录
 
@@ -63,25 +175,17 @@ async def get_chat_history(session_id: str = "default", limit: int = 50):
     Returns:
         List[Dict]: 聊天历史记录
     """
-    if not ai_agent:
-        raise HTTPException(status_code=500, detail="AI Agent 未初始化")
-
     try:
-        # 从 AI Agent 的内存中获取历史记录
-        memory = ai_agent.memory
-        if hasattr(memory, "get_conversation_history"):
-            history = memory.get_conversation_history(session_id, limit)
-            return {"success": True, "history": history}
-        else:
-            # 如果没有实现历史记录功能，返回空列表
-            return {"success": True, "history": []}
+        # 从聊天历史存储中读取，不访问 AI Agent 的内存结构
+        history = _load_history(session_id, limit) if limit > 0 else []
+        return {"success": True, "history": history}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取历史记录失败: {str(e)}")
 
 
 @router.delete("/history")
-async def clear_chat_history(session_id: str = "default"):
+def clear_chat_history(session_id: str = "default"):
     """
     清空指定会话的聊天历史
 
@@ -91,29 +195,23 @@ async def clear_chat_history(session_id: str = "default"):
     Returns:
         Dict: 操作结果
     """
-    if not ai_agent:
-        raise HTTPException(status_code=500, detail="AI Agent 未初始化")
-
     try:
-        memory = ai_agent.memory
-        if hasattr(memory, "clear_session"):
-            memory.clear_session(session_id)
-            return {"success": True, "message": f"会话 {session_id} 历史记录已清空"}
-        else:
-            return {"success": True, "message": "历史记录功能未实现"}
+        _clear_history(session_id)
+        return {"success": True, "message": f"会话 {session_id} 历史记录已清空"}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"清空历史记录失败: {str(e)}")
 
 
 @router.post("/system-info")
-async def get_system_info():
+async def get_system_info(request: Request):
     """
     获取 AI 系统信息和状态
 
     Returns:
         Dict: 系统状态信息
     """
+    ai_agent = get_ai_agent(request)
     if not ai_agent:
         raise HTTPException(status_code=500, detail="AI Agent 未初始化")
 
@@ -136,7 +234,7 @@ async def get_system_info():
                 "数据导出工具",
             ],
             "mcp_status": "可选功能",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
 
         return {"success": True, "system_info": info}
@@ -2,47 +2,134 @@
 数据管理接口实现
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import (
+    FileResponse,
+    ORJSONResponse,
+    Response,
+    StreamingResponse,
+)
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
-import json
+from functools import lru_cache
 from pathlib import Path
+import asyncio
+import os
+import orjson
 
-from .main import ai_agent, time_service
+from .utils import (
+    cached_frontend_export,
+    current_time_info,
+    get_ai_agent,
+    get_time_service,
+    now_iso,
+    with_cache_headers,
+)
 
-router = APIRouter(prefix="/api/data", tags=["数据管理"])
+router = APIRouter(
+    prefix="/api/data", tags=["数据管理"], default_response_class=ORJSONResponse
+)
+
+# AI 生成时间表的保存目录
+SCHEDULES_DIR = "ai_generated_schedules"
+
+# 数据备份目录
+BACKUP_DIR = Path("backups")
+
+
+@router.on_event("startup")
+def _ensure_backup_dir():
+    """启动时创建备份目录，避免每次备份请求都检查"""
+    BACKUP_DIR.mkdir(exist_ok=True)
+
+
+def _scan_schedule_files() -> List[Tuple[str, os.stat_result]]:
+    """
+    单次扫描时间表目录
+
+    Returns:
+        List[Tuple[str, os.stat_result]]: 所有 JSON 文件的路径及 stat 信息，目录不存在时为空
+    """
+    try:
+        with os.scandir(SCHEDULES_DIR) as it:
+            return [
+                (entry.path, entry.stat())
+                for entry in it
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
+
+
+@lru_cache(maxsize=8)
+def _read_schedule_file(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    读取时间表文件并生成完整响应体
+
+    缓存键包含文件的修改时间和大小，文件一旦变化缓存即自动失效。
+    """
+    schedule_file = Path(path)
+    data = orjson.loads(schedule_file.read_bytes())
+    return orjson.dumps({"success": True, "schedule": data, "source": schedule_file.name})
+
+
+def _schedule_response(
+    schedule_file: Path,
+    request: Request,
+    wrap: bool,
+    st: Optional[os.stat_result] = None,
+) -> Response:
+    """
+    返回时间表文件响应
+
+    默认直接返回文件内容，并通过 ETag 支持条件请求；wrap 为 True 时返回带元信息的封装结构。
+    """
+    st = st or schedule_file.stat()
+    if wrap:
+        body = _read_schedule_file(str(schedule_file), st.st_mtime_ns, st.st_size)
+        response = Response(content=body, media_type="application/json")
+    else:
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        headers = {"ETag": etag, "X-Schedule-Source": schedule_file.name}
+        if request.headers.get("if-none-match") == etag:
+            response = Response(status_code=304, headers=headers)
+        else:
+            response = FileResponse(
+                schedule_file,
+                media_type="application/json",
+                headers=headers,
+                stat_result=st,
+            )
+    return with_cache_headers(response, max_age=5, stale_while_revalidate=30)
 
 
 @router.get("/schedules/latest")
-async def get_latest_schedule():
+def get_latest_schedule(
+    request: Request,
+    wrap: bool = Query(False, description="是否返回带 success/source 的封装结构"),
+):
     """
     获取最新的 AI 生成的时间表
 
+    Args:
+        wrap: 为 True 时返回 {"success", "schedule", "source"} 封装结构，
+            否则直接返回时间表文件，来源文件名见 X-Schedule-Source 响应头
+
     Returns:
-        Dict: 最新时间表数据
+        Response: 最新时间表数据
     """
     try:
         # 检查 latest_schedule.json 文件
         latest_file = Path("latest_schedule.json")
         if latest_file.exists():
-            with open(latest_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return {"success": True, "schedule": data, "source": "latest_schedule.json"}
+            return _schedule_response(latest_file, request, wrap)
 
         # 如果没有最新文件，检查 ai_generated_schedules 目录
-        schedules_dir = Path("ai_generated_schedules")
-        if schedules_dir.exists():
-            schedule_files = list(schedules_dir.glob("*.json"))
-            if schedule_files:
-                # 获取最新的文件
-                latest_file = max(schedule_files, key=lambda f: f.stat().st_mtime)
-                with open(latest_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return {
-                    "success": True,
-                    "schedule": data,
-                    "source": str(latest_file.name),
-                }
+        schedule_files = _scan_schedule_files()
+        if schedule_files:
+            # 获取最新的文件
+            path, st = max(schedule_files, key=lambda item: item[1].st_mtime_ns)
+            return _schedule_response(Path(path), request, wrap, st)
 
         # 如果都没有，返回空
         return {"success": True, "schedule": None, "message": "暂无AI生成的时间表"}
@@ -51,6 +138,48 @@ async def get_latest_schedule():
         raise HTTPException(status_code=500, detail=f"获取最新时间表失败: {str(e)}")
 
 
+def _read_schedule_entry(path: str, mtime: float) -> Optional[bytes]:
+    """
+    读取单个历史时间表文件并编码为响应片段
+
+    文件内容原样拼接进响应，仅解析一次用于校验；读取或校验失败时返回 None。
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        orjson.loads(raw)
+    except Exception as e:
+        print(f"读取文件 {path} 失败: {e}")
+        return None
+
+    return (
+        b'{"filename":'
+        + orjson.dumps(os.path.basename(path))
+        + b',"timestamp":'
+        + orjson.dumps(datetime.fromtimestamp(mtime).isoformat())
+        + b',"data":'
+        + raw.strip()
+        + b"}"
+    )
+
+
+async def _stream_schedule_history(
+    schedule_files: List[Tuple[str, os.stat_result]]
+) -> AsyncIterator[bytes]:
+    """逐个读取历史时间表并输出 JSON 片段，内存占用只与单个文件大小相关"""
+    yield b'{"success":true,"schedules":['
+    count = 0
+    for path, st in schedule_files:
+        chunk = await asyncio.to_thread(_read_schedule_entry, path, st.st_mtime)
+        if chunk is None:
+            continue
+        if count:
+            yield b","
+        yield chunk
+        count += 1
+    yield b'],"count":' + str(count).encode() + b"}"
+
+
 @router.get("/schedules/history")
 async def get_schedule_history(limit: int = Query(10, description="返回数量限制")):
     """
@@ -60,79 +189,59 @@ async def get_schedule_history(limit: int = Query(10, description="返回数量
         limit: 返回的时间表数量限制
 
     Returns:
-        Dict: 历史时间表列表
+        StreamingResponse: 历史时间表列表（流式输出）
     """
     try:
-        schedules_dir = Path("ai_generated_schedules")
-        if not schedules_dir.exists():
+        if not os.path.isdir(SCHEDULES_DIR):
             return {"success": True, "schedules": [], "message": "暂无历史时间表"}
 
-        # 获取所有JSON文件
-        schedule_files = list(schedules_dir.glob("*.json"))
+        # 单次扫描获取所有JSON文件及其 stat 信息
+        schedule_files = _scan_schedule_files()
 
         # 按修改时间排序（最新的在前）
-        schedule_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-
-        # 限制数量
-        schedule_files = schedule_files[:limit]
-
-        schedules = []
-        for file in schedule_files:
-            try:
-                with open(file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    schedules.append(
-                        {
-                            "filename": file.name,
-                            "timestamp": datetime.fromtimestamp(
-                                file.stat().st_mtime
-                            ).isoformat(),
-                            "data": data,
-                        }
-                    )
-            except Exception as e:
-                print(f"读取文件 {file} 失败: {e}")
-                continue
-
-        return {"success": True, "schedules": schedules, "count": len(schedules)}
+        schedule_files.sort(key=lambda item: item[1].st_mtime_ns, reverse=True)
+
+        # 限制数量，逐个文件读取并流式返回
+        return StreamingResponse(
+            _stream_schedule_history(schedule_files[:limit]),
+            media_type="application/json",
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取时间表历史失败: {str(e)}")
 
 
 @router.post("/export/frontend")
-async def export_for_frontend():
+def export_for_frontend(request: Request):
     """
     为前端导出完整数据
 
     Returns:
         Dict: 前端需要的完整数据
     """
+    ai_agent = get_ai_agent(request)
     if not ai_agent:
         raise HTTPException(status_code=500, detail="AI Agent 未初始化")
 
     try:
-        # 使用 AI Agent 的前端导出功能
-        export_data = ai_agent.export_schedule_for_frontend()
-
-        return {
-            "success": True,
-            "data": export_data,
-            "export_time": datetime.now().isoformat(),
-        }
+        # 使用 AI Agent 的前端导出功能（数据未变化时复用缓存）
+        return Response(
+            content=cached_frontend_export(ai_agent), media_type="application/json"
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"前端数据导出失败: {str(e)}")
 
 
 @router.get("/current-data")
-async def get_current_data():
+def get_current_data(request: Request):
     """
     获取当前的时间管理数据
 
     Returns:
         Dict: 当前数据状态
     """
+    time_service = get_time_service(request)
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
@@ -147,7 +256,7 @@ async def get_current_data():
             "success": True,
             "current_data": current_data,
             "statistics": stats,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
 
     except Exception as e:
@@ -155,31 +264,27 @@ async def get_current_data():
 
 
 @router.post("/backup")
-async def create_backup():
+def create_backup(request: Request):
     """
     创建数据备份
 
     Returns:
         Dict: 备份操作结果
     """
+    time_service = get_time_service(request)
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
     try:
-        # 创建备份目录
-        backup_dir = Path("backups")
-        backup_dir.mkdir(exist_ok=True)
-
         # 生成备份文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = backup_dir / f"backup_{timestamp}.json"
+        backup_file = BACKUP_DIR / f"backup_{timestamp}.json"
 
         # 导出当前数据
-        current_data = time_service.export_json()
+        current_data = time_service.snapshot()
 
         # 保存备份
-        with open(backup_file, "w", encoding="utf-8") as f:
-            json.dump(current_data, f, ensure_ascii=False, indent=2)
+        backup_file.write_bytes(orjson.dumps(current_data, option=orjson.OPT_INDENT_2))
 
         return {
             "success": True,
@@ -201,53 +306,52 @@ async def get_time_info():
         Dict: 时间信息
     """
     try:
-        from time_planner.new_models import TimeUtils
-
-        # 获取详细时间信息
-        time_info = {
-            "current_time": TimeUtils.get_current_time_info(),
-            "detailed_time": TimeUtils.get_detailed_time_info(),
-            "week_progress": TimeUtils.get_week_progress(),
-            "timestamp": datetime.now().isoformat(),
-        }
-
-        return {"success": True, "time_info": time_info}
+        return with_cache_headers(
+            ORJSONResponse(
+                {"success": True, "time_info": current_time_info()}
+            ),
+            max_age=1,
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取时间信息失败: {str(e)}")
 
 
 @router.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """
     健康检查接口
 
     Returns:
         Dict: 系统健康状态
     """
+    ai_agent = get_ai_agent(request)
+    time_service = get_time_service(request)
     try:
         health_status = {
             "api_status": "健康",
             "ai_agent_status": "已初始化" if ai_agent else "未初始化",
             "time_service_status": "已初始化" if time_service else "未初始化",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "version": "1.0.0",
         }
 
         # 检查关键文件是否存在
         files_status = {
             "time_management_data.json": Path("time_management_data.json").exists(),
-            "conversation_memory.json": Path("conversation_memory.json").exists(),
-            "ai_generated_schedules_dir": Path("ai_generated_schedules").exists(),
+            "conversation_memory.jsonl": Path("conversation_memory.jsonl").exists(),
+            "ai_generated_schedules_dir": os.path.isdir(SCHEDULES_DIR),
         }
 
         health_status["files_status"] = files_status
 
-        return {"success": True, "health": health_status}
+        return with_cache_headers(
+            ORJSONResponse({"success": True, "health": health_status}), max_age=1
+        )
 
     except Exception as e:
         return {
             "success": False,
             "error": str(e),
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
@@ -12,34 +12,193 @@ from fastapi import (
     FastAPI,
     HTTPException,
     BackgroundTasks,
+    Depends,
+    Request,
     WebSocket,
     WebSocketDisconnect,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from contextlib import asynccontextmanager, suppress
 import asyncio
 import sys
 import os
-import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Set, Tuple
+from pydantic import BaseModel, TypeAdapter, field_validator
+import msgspec
+import orjson
 import uvicorn
-from datetime import datetime
+from loguru import logger
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from time_planner.new_agent import NewTimeManagementAgent
+from time_planner.new_agent import TOOLS_USED, NewTimeManagementAgent
 from time_planner.new_services import TimeManagementService
-from time_planner.new_models import Priority
+from time_planner.new_models import DailyTask, Priority, WeeklyTask
+from backend_api.utils import (
+    current_time_info,
+    now_iso,
+    parse_priority,
+    ts_refresher,
+)
 
 # 全局变量：AI Agent 实例
 ai_agent: Optional[NewTimeManagementAgent] = None
 time_service: Optional[TimeManagementService] = None
 
+# JSON 文件内容缓存：路径 -> ((mtime_ns, size), 文件原始字节)
+_json_cache: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+_json_cache_lock = asyncio.Lock()
+
+
+def _read_json_bytes(path: Path) -> bytes:
+    """读取 JSON 文件原始字节，并校验一次格式以便直接拼接到响应中"""
+    raw = path.read_bytes().strip()
+    orjson.loads(raw)
+    return raw
+
+
+async def _load_json_cached(path: Path) -> bytes:
+    """
+    读取 JSON 文件原始字节，文件未变化时直接返回缓存结果
+
+    以文件的修改时间和大小判断是否变化，命中时只需一次 stat 调用；
+    文件内容不在 Python 侧解析成对象，直接拼接进响应体。
+    stat 与读取均在线程中执行，不阻塞事件循环；文件不存在时抛出 FileNotFoundError。
+    """
+    st = await asyncio.to_thread(path.stat)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _json_cache.get(str(path))
+    if cached and cached[0] == key:
+        return cached[1]
+
+    async with _json_cache_lock:
+        # 等待锁期间其他请求可能已完成加载
+        cached = _json_cache.get(str(path))
+        if cached and cached[0] == key:
+            return cached[1]
+        raw = await asyncio.to_thread(_read_json_bytes, path)
+        _json_cache[str(path)] = (key, raw)
+        return raw
+
+
+# 数据文件路径，模块加载时构建一次
+_DATA_FILE = Path("time_management_data.json")
+_LATEST_FILE = Path("latest_schedule.json")
+_SCHEDULES_DIR = Path("ai_generated_schedules")
+
+# 时间表目录中最新文件的缓存：(目录 mtime_ns, 最新文件路径)
+_latest_cache: Optional[Tuple[int, Optional[Path]]] = None
+
+
+def _find_latest_schedule() -> Optional[Path]:
+    """
+    查找最新的时间表文件（同步函数，需在线程中调用）
+
+    优先使用 latest_schedule.json，否则取 ai_generated_schedules 目录中修改时间最新的文件。
+    目录的 mtime 只在增删文件时变化，未变化时直接复用上次扫描结果。
+    """
+    global _latest_cache
+    if _LATEST_FILE.exists():
+        return _LATEST_FILE
+
+    try:
+        dir_mtime = _SCHEDULES_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _latest_cache and _latest_cache[0] == dir_mtime:
+        return _latest_cache[1]
+
+    with os.scandir(_SCHEDULES_DIR) as it:
+        entries = [
+            (entry.stat().st_mtime_ns, entry.path)
+            for entry in it
+            if entry.name.endswith(".json") and entry.is_file()
+        ]
+    latest = Path(max(entries)[1]) if entries else None
+    _latest_cache = (dir_mtime, latest)
+    return latest
+
+
+def _schedule_envelope(raw: bytes, source: str) -> Response:
+    """将时间表文件原始字节包装为接口响应"""
+    return Response(
+        content=b'{"success":true,"schedule":'
+        + raw
+        + b',"source":'
+        + orjson.dumps(source)
+        + b"}",
+        media_type="application/json",
+    )
+
+
+# 正在处理中的 AI 请求：(会话ID, 消息) -> 执行该请求的任务，相同请求复用同一次调用
+_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+
+async def _run_agent(message: str) -> Tuple[str, Tuple[str, ...]]:
+    """执行 Agent 调用，并在同一任务上下文中读取本次请求记录的工具"""
+    return await ai_agent.process_user_request(message), TOOLS_USED.get()
+
+
+async def _process_coalesced(
+    session_id: str, message: str
+) -> Tuple[str, Tuple[str, ...]]:
+    """
+    处理用户请求，合并同一会话中并发的相同消息
+
+    后到的相同请求直接等待第一个请求的结果，避免重复调用大模型。
+    Agent 调用在由 _inflight 持有的独立任务中执行，各调用方通过 shield 等待，
+    某个调用方被取消只会停止它自己的等待，不会取消其他调用方共享的任务。
+
+    Returns:
+        Tuple[str, Tuple[str, ...]]: AI 回复及本次调用的工具（不可变元组，可直接共享）
+    """
+    key = (session_id, message)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_agent(message))
+        _inflight[key] = task
+
+        def _done(t: asyncio.Task):
+            if _inflight.get(key) is t:
+                del _inflight[key]
+            # 标记异常已被获取，避免所有等待者都已取消时输出警告
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_done)
+    return await asyncio.shield(task)
+
+
+# 本模块添加的日志处理器 ID，生命周期多次启动时只配置一次
+_log_handler_id: Optional[int] = None
+
+
+def _configure_logging():
+    """
+    配置控制台日志（只执行一次）
+
+    日志经队列由后台线程写出，记录日志只需入队，不阻塞事件循环；
+    只移除 loguru 的默认处理器，保留嵌入方或测试添加的处理器。
+    """
+    global _log_handler_id
+    if _log_handler_id is not None:
+        return
+    # 默认处理器 ID 为 0，已被其他代码移除时忽略
+    with suppress(ValueError):
+        logger.remove(0)
+    _log_handler_id = logger.add(
+        sys.stderr,
+        format="<level>{level}</level> | {message}",
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        enqueue=True,
+    )
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -47,6 +206,9 @@ async def lifespan(app: FastAPI):
     global ai_agent, time_service
 
     # 启动时初始化
+    _configure_logging()
+    # 后台每 50 毫秒刷新一次缓存时间戳，接口和 WebSocket 消息直接复用
+    ts_task = asyncio.create_task(ts_refresher(0.05))
     try:
         ai_agent = NewTimeManagementAgent()
         time_service = ai_agent.time_service
@@ -57,6 +219,8 @@ async def lifespan(app: FastAPI):
     yield
 
     # 关闭时清理
+    ts_task.cancel()
+    await logger.complete()
     if ai_agent:
         try:
             # AI Agent 没有 shutdown 方法，直接设为 None
@@ -74,6 +238,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -86,17 +251,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 配置 GZip 压缩 - 数据/时间表/导出等大体积 JSON 响应，小于 1KB 的响应不压缩
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 
 # ==================== 数据模型定义 ====================
 
+# 任务列表序列化适配器，整个列表一次性导出，避免逐个调用 .dict()
+DAILY_TASKS_ADAPTER = TypeAdapter(List[DailyTask])
+WEEKLY_TASKS_ADAPTER = TypeAdapter(List[WeeklyTask])
+
 
-class ChatMessage(BaseModel):
+# 高频请求体使用 msgspec.Struct，解码与校验比 Pydantic 快数倍
+
+
+class ChatMessage(msgspec.Struct):
     """聊天消息模型"""
 
     message: str
     session_id: Optional[str] = "default"
 
 
+class WSMessage(msgspec.Struct, frozen=True):
+    """WebSocket 入站消息模型"""
+
+    type: str = ""
+    message: str = ""
+    session_id: str = "default"
+
+
+# WebSocket 入站消息解码器，模块加载时构建一次
+_WS_DECODER = msgspec.json.Decoder(WSMessage)
+
+
+def msgspec_body(model: type):
+    """
+    生成使用 msgspec 解码请求体的依赖
+
+    解码或校验失败时返回 422。
+    """
+    decoder = msgspec.json.Decoder(model)
+
+    async def _decode(request: Request):
+        try:
+            return decoder.decode(await request.body())
+        except msgspec.DecodeError as e:
+            raise HTTPException(status_code=422, detail=f"请求体格式错误: {str(e)}")
+
+    return _decode
+
+
 class ChatResponse(BaseModel):
     """聊天响应模型"""
 
@@ -115,9 +319,11 @@ class TaskBase(BaseModel):
     description: str = ""
 
 
-class DailyTaskCreate(TaskBase):
+class DailyTaskCreate(msgspec.Struct, kw_only=True):
     """创建日任务模型"""
 
+    task_name: str
+    description: str = ""
     date_str: str
     start_time: str
     end_time: str
@@ -132,7 +338,27 @@ class WeeklyTaskCreate(TaskBase):
 
     week_number: int
     parent_project: Optional[str] = None
-    priority: str = "medium"
+    priority: Priority = Priority.MEDIUM
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _parse_priority(cls, value: Any) -> Any:
+        """解析时直接转换为 Priority 枚举（忽略大小写），非法值返回 422"""
+        return parse_priority(value)
+
+
+class BatchItem(msgspec.Struct):
+    """批量操作中的单个子请求"""
+
+    id: str
+    op: str
+    payload: Dict[str, Any] = {}
+
+
+class BatchRequest(msgspec.Struct):
+    """批量操作请求模型"""
+
+    requests: List[BatchItem]
 
 
 class TaskUpdate(BaseModel):
@@ -175,7 +401,7 @@ async def health():
     """健康检查端点"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "ai_agent_status": ai_agent is not None,
         "time_service_status": time_service is not None,
     }
@@ -184,25 +410,27 @@ async def health():
 # ==================== AI 聊天接口 ====================
 
 
-@app.post("/api/chat/message", response_model=ChatResponse)
-async def send_message(chat_message: ChatMessage):
+@app.post("/api/chat/message", responses={200: {"model": ChatResponse}})
+async def send_message(
+    chat_message: ChatMessage = Depends(msgspec_body(ChatMessage)),
+):
     """向 AI 发送消息并获取响应"""
     if not ai_agent:
         raise HTTPException(status_code=500, detail="AI Agent 未初始化")
 
     try:
-        # 异步调用 AI Agent 处理用户请求
-        response = await ai_agent.process_user_request(chat_message.message)
-
-        # 获取使用的工具列表（从 AI Agent 状态中获取）
-        tools_used = getattr(ai_agent, "last_tools_used", [])
+        # 异步调用 AI Agent 处理用户请求（合并并发的相同请求）
+        response, tools_used = await _process_coalesced(
+            chat_message.session_id, chat_message.message
+        )
 
-        return ChatResponse(
+        # 字段均由服务端生成，跳过校验直接构造；文档中的响应结构见 responses 声明
+        return ChatResponse.model_construct(
             success=True,
             message=chat_message.message,
             response=response,
             tools_used=tools_used,
-            timestamp=datetime.now().isoformat(),
+            timestamp=now_iso(),
             session_id=chat_message.session_id,
         )
 
@@ -217,22 +445,20 @@ async def get_current_data():
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
     try:
-        # 直接读取 JSON 文件数据
-        from pathlib import Path
-        import json
-
-        data_file = Path("time_management_data.json")
-        if data_file.exists():
-            with open(data_file, "r", encoding="utf-8") as f:
-                current_data = json.load(f)
-        else:
-            current_data = {"daily_schedules": {}, "weekly_schedules": {}}
-
-        return {
-            "success": True,
-            "data": current_data,
-            "timestamp": datetime.now().isoformat(),
-        }
+        # 读取 JSON 文件原始字节（文件未变化时使用缓存），不做解析直接拼接
+        try:
+            current_data = await _load_json_cached(_DATA_FILE)
+        except FileNotFoundError:
+            current_data = b'{"daily_schedules":{},"weekly_schedules":{}}'
+
+        return Response(
+            content=b'{"success":true,"data":'
+            + current_data
+            + b',"timestamp":'
+            + orjson.dumps(now_iso())
+            + b"}",
+            media_type="application/json",
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取数据失败: {str(e)}")
 
@@ -260,9 +486,8 @@ async def get_chat_history(session_id: str = "default", limit: int = 50):
 # ==================== 任务管理接口 ====================
 
 
-@app.post("/api/tasks/daily")
-async def create_daily_task(task_data: DailyTaskCreate):
-    """创建日任务"""
+def _create_daily_impl(task_data: DailyTaskCreate) -> Dict[str, Any]:
+    """创建日任务（单个接口与批量接口共用）"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
@@ -283,18 +508,19 @@ async def create_daily_task(task_data: DailyTaskCreate):
             return {
                 "success": True,
                 "message": f"日任务 '{task_data.task_name}' 创建成功",
-                "task_data": task_data.dict(),
+                "task_data": msgspec.structs.asdict(task_data),
             }
         else:
             raise HTTPException(status_code=400, detail="日任务创建失败")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建日任务失败: {str(e)}")
 
 
-@app.get("/api/tasks/daily")
-async def get_daily_tasks(date: str):
-    """获取指定日期的日任务"""
+def _get_daily_impl(date: str) -> Dict[str, Any]:
+    """获取指定日期的日任务（单个接口与批量接口共用）"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
@@ -303,7 +529,7 @@ async def get_daily_tasks(date: str):
         return {
             "success": True,
             "date": date,
-            "tasks": [task.dict() for task in tasks],
+            "tasks": DAILY_TASKS_ADAPTER.dump_python(tasks),
             "count": len(tasks),
         }
 
@@ -311,27 +537,19 @@ async def get_daily_tasks(date: str):
         raise HTTPException(status_code=500, detail=f"获取日任务失败: {str(e)}")
 
 
-@app.post("/api/tasks/weekly")
-async def create_weekly_task(task_data: WeeklyTaskCreate):
-    """创建周任务"""
+def _create_weekly_impl(task_data: WeeklyTaskCreate) -> Dict[str, Any]:
+    """创建周任务（单个接口与批量接口共用）"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
     try:
-        # 转换 priority 字符串为 Priority 枚举
-        priority_map = {
-            "low": Priority.LOW,
-            "medium": Priority.MEDIUM,
-            "high": Priority.HIGH,
-        }
-        priority_enum = priority_map.get(task_data.priority.lower(), Priority.MEDIUM)
-
+        # priority 在请求解析时已转换为 Priority 枚举
         success = time_service.add_weekly_task(
             week_number=task_data.week_number,
             task_name=task_data.task_name,
             description=task_data.description,
             parent_project=task_data.parent_project,
-            priority=priority_enum,
+            priority=task_data.priority,
         )
 
         if success:
@@ -343,13 +561,14 @@ async def create_weekly_task(task_data: WeeklyTaskCreate):
         else:
             raise HTTPException(status_code=400, detail="周任务创建失败")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建周任务失败: {str(e)}")
 
 
-@app.get("/api/tasks/weekly")
-async def get_weekly_tasks(week: int):
-    """获取指定周的周任务"""
+def _get_weekly_impl(week: int) -> Dict[str, Any]:
+    """获取指定周的周任务（单个接口与批量接口共用）"""
     if not time_service:
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
@@ -358,7 +577,7 @@ async def get_weekly_tasks(week: int):
         return {
             "success": True,
             "week_number": week,
-            "tasks": [task.dict() for task in tasks],
+            "tasks": WEEKLY_TASKS_ADAPTER.dump_python(tasks),
             "count": len(tasks),
         }
 
@@ -366,6 +585,84 @@ async def get_weekly_tasks(week: int):
         raise HTTPException(status_code=500, detail=f"获取周任务失败: {str(e)}")
 
 
+@app.post("/api/tasks/daily")
+async def create_daily_task(
+    task_data: DailyTaskCreate = Depends(msgspec_body(DailyTaskCreate)),
+):
+    """创建日任务"""
+    # 写入数据文件为阻塞操作，放到线程中执行
+    return await asyncio.to_thread(_create_daily_impl, task_data)
+
+
+@app.get("/api/tasks/daily")
+async def get_daily_tasks(date: str):
+    """获取指定日期的日任务"""
+    return _get_daily_impl(date)
+
+
+@app.post("/api/tasks/weekly")
+async def create_weekly_task(task_data: WeeklyTaskCreate):
+    """创建周任务"""
+    # 写入数据文件为阻塞操作，放到线程中执行
+    return await asyncio.to_thread(_create_weekly_impl, task_data)
+
+
+@app.get("/api/tasks/weekly")
+async def get_weekly_tasks(week: int):
+    """获取指定周的周任务"""
+    return _get_weekly_impl(week)
+
+
+# 批量操作类型 -> (请求负载解析函数, 处理函数)
+_BATCH_OPS = {
+    "create_daily": (
+        lambda payload: msgspec.convert(payload, DailyTaskCreate),
+        _create_daily_impl,
+    ),
+    "get_daily": (lambda payload: payload["date"], _get_daily_impl),
+    "create_weekly": (WeeklyTaskCreate.model_validate, _create_weekly_impl),
+    "get_weekly": (lambda payload: int(payload["week"]), _get_weekly_impl),
+}
+
+
+def _dispatch_batch_item(item: BatchItem) -> Dict[str, Any]:
+    """执行单个批量子请求，错误转换为对应状态码而不影响其他子请求"""
+    op = _BATCH_OPS.get(item.op)
+    if op is None:
+        return {"id": item.id, "status": 400, "error": f"未知的操作类型: {item.op}"}
+
+    parse, handler = op
+    try:
+        body = handler(parse(item.payload))
+        return {"id": item.id, "status": 200, "body": body}
+    except HTTPException as e:
+        return {"id": item.id, "status": e.status_code, "error": e.detail}
+    except Exception as e:
+        return {"id": item.id, "status": 422, "error": f"请求负载错误: {str(e)}"}
+
+
+def _run_batch(items: List[BatchItem]) -> List[Dict[str, Any]]:
+    """按顺序执行批量子请求，所有写操作完成后只保存一次数据文件"""
+    if not time_service:
+        return [_dispatch_batch_item(item) for item in items]
+    with time_service.deferred_save():
+        return [_dispatch_batch_item(item) for item in items]
+
+
+@app.post("/api/tasks/batch")
+async def batch_tasks(batch: BatchRequest = Depends(msgspec_body(BatchRequest))):
+    """
+    批量执行任务操作
+
+    请求体格式：{"requests": [{"id": "1", "op": "create_daily", "payload": {...}}]}，
+    op 可选 create_daily / get_daily / create_weekly / get_weekly，
+    子请求在同一个工作线程中按顺序执行，不阻塞事件循环；批量中的写操作合并为一次保存。
+    每个子请求独立返回状态码，单个失败不影响其他子请求。
+    """
+    responses = await asyncio.to_thread(_run_batch, batch.requests)
+    return {"success": True, "responses": responses}
+
+
 @app.get("/api/tasks/statistics")
 async def get_task_statistics():
     """获取任务统计信息"""
@@ -377,7 +674,7 @@ async def get_task_statistics():
         return {
             "success": True,
             "statistics": stats,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
 
     except Exception as e:
@@ -391,29 +688,11 @@ async def get_task_statistics():
 async def get_latest_schedule():
     """获取最新的 AI 生成的时间表"""
     try:
-        import json
-
-        # 检查 latest_schedule.json 文件
-        latest_file = Path("latest_schedule.json")
-        if latest_file.exists():
-            with open(latest_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return {"success": True, "schedule": data, "source": "latest_schedule.json"}
-
-        # 如果没有最新文件，检查 ai_generated_schedules 目录
-        schedules_dir = Path("ai_generated_schedules")
-        if schedules_dir.exists():
-            schedule_files = list(schedules_dir.glob("*.json"))
-            if schedule_files:
-                # 获取最新的文件
-                latest_file = max(schedule_files, key=lambda f: f.stat().st_mtime)
-                with open(latest_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return {
-                    "success": True,
-                    "schedule": data,
-                    "source": str(latest_file.name),
-                }
+        # 查找最新文件需要多次 stat 调用，放到线程中执行
+        latest_file = await asyncio.to_thread(_find_latest_schedule)
+        if latest_file is not None:
+            raw = await _load_json_cached(latest_file)
+            return _schedule_envelope(raw, latest_file.name)
 
         # 如果都没有，返回空
         return {"success": True, "schedule": None, "message": "暂无AI生成的时间表"}
@@ -435,7 +714,7 @@ async def export_for_frontend():
         return {
             "success": True,
             "data": export_data,
-            "export_time": datetime.now().isoformat(),
+            "export_time": now_iso(),
         }
 
     except Exception as e:
@@ -446,17 +725,8 @@ async def export_for_frontend():
 async def get_time_info():
     """获取当前时间信息"""
     try:
-        from time_planner.new_models import TimeUtils
-
-        # 获取详细时间信息
-        time_info = {
-            "current_time": TimeUtils.get_current_time_info(),
-            "detailed_time": TimeUtils.get_detailed_time_info(),
-            "week_progress": TimeUtils.get_week_progress(),
-            "timestamp": datetime.now().isoformat(),
-        }
-
-        return {"success": True, "time_info": time_info}
+        # 当前时间、详细时间和本周进度一次计算，同一秒内复用
+        return {"success": True, "time_info": current_time_info()}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取时间信息失败: {str(e)}")
@@ -469,26 +739,29 @@ class ConnectionManager:
     """WebSocket 连接管理器"""
 
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
-        print(f"WebSocket 连接建立，当前连接数: {len(self.active_connections)}")
+        self.active_connections.add(websocket)
+        logger.debug("WebSocket 连接建立，当前连接数: {}", len(self.active_connections))
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        print(f"WebSocket 连接断开，当前连接数: {len(self.active_connections)}")
+        self.active_connections.discard(websocket)
+        logger.debug("WebSocket 连接断开，当前连接数: {}", len(self.active_connections))
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
+        """并发向所有连接发送消息（消息已是编码好的文本，各连接共用）"""
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(message) for connection in connections),
+            return_exceptions=True,
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
                 # 如果发送失败，移除该连接
                 self.disconnect(connection)
 
@@ -496,6 +769,32 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
+def _frame_template(payload: Dict[str, Any]) -> str:
+    """
+    预先编码固定内容的控制消息，仅保留末尾的时间戳字段待填充
+
+    WebSocket 需要发送文本帧（前端对 event.data 直接 JSON.parse），因此模板保存为 str。
+    """
+    return orjson.dumps(payload).decode()[:-1] + ',"timestamp":"'
+
+
+# 欢迎和处理中消息内容固定，启动时编码一次，发送时只拼接时间戳
+_WELCOME_FRAME = _frame_template({"type": "system", "message": "WebSocket 连接已建立"})
+_PROCESSING_FRAME = _frame_template({"type": "processing", "message": "AI 正在思考中..."})
+
+# 内容可变的消息只预先编码固定部分，发送时仅对 message 等可变字段做 JSON 转义
+_USER_MESSAGE_PREFIX = _frame_template({"type": "user_message"})
+_AI_RESPONSE_PREFIX = _frame_template({"type": "ai_response"})
+_ERROR_PREFIX = _frame_template({"type": "error"})
+
+
+def _message_frame(prefix: str, message: str, extra: str = "") -> str:
+    """拼接带时间戳和消息内容的文本帧，extra 为已编码的附加字段（以逗号开头）"""
+    return (
+        prefix + now_iso() + '","message":' + orjson.dumps(message).decode() + extra + "}"
+    )
+
+
 @app.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket 聊天端点"""
@@ -503,77 +802,68 @@ async def websocket_endpoint(websocket: WebSocket):
 
     try:
         # 发送欢迎消息
-        welcome_message = {
-            "type": "system",
-            "message": "WebSocket 连接已建立",
-            "timestamp": datetime.now().isoformat(),
-        }
-        await manager.send_personal_message(json.dumps(welcome_message), websocket)
+        await manager.send_personal_message(
+            _WELCOME_FRAME + now_iso() + '"}', websocket
+        )
 
         while True:
             # 接收消息
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            try:
+                message_data = _WS_DECODER.decode(data)
+            except msgspec.DecodeError as e:
+                # 格式错误的消息只返回错误提示，不断开连接
+                await manager.send_personal_message(
+                    _message_frame(_ERROR_PREFIX, f"消息格式错误: {str(e)}"), websocket
+                )
+                continue
 
-            print(f"收到 WebSocket 消息: {message_data}")
+            logger.debug("收到 WebSocket 消息: {}", message_data)
 
             # 处理聊天消息
-            if message_data.get("type") == "chat":
-                user_message = message_data.get("message", "")
-                session_id = message_data.get("session_id", "default")
+            if message_data.type == "chat":
+                user_message = message_data.message
+                session_id = message_data.session_id
 
                 if user_message.strip():
                     try:
                         # 发送用户消息确认
-                        user_confirm = {
-                            "type": "user_message",
-                            "message": user_message,
-                            "timestamp": datetime.now().isoformat(),
-                        }
                         await manager.send_personal_message(
-                            json.dumps(user_confirm), websocket
+                            _message_frame(_USER_MESSAGE_PREFIX, user_message), websocket
                         )
 
                         # 发送处理中状态
-                        processing = {
-                            "type": "processing",
-                            "message": "AI 正在思考中...",
-                            "timestamp": datetime.now().isoformat(),
-                        }
                         await manager.send_personal_message(
-                            json.dumps(processing), websocket
+                            _PROCESSING_FRAME + now_iso() + '"}', websocket
                         )
 
                         # 调用 AI 处理
-                        result = await ai_agent.process_user_request(user_message)
+                        result, tools_used = await _process_coalesced(
+                            session_id, user_message
+                        )
 
                         # 发送 AI 响应
-                        ai_response = {
-                            "type": "ai_response",
-                            "message": result,
-                            "tools_used": [],  # process_user_request 返回字符串，工具信息在内部处理
-                            "timestamp": datetime.now().isoformat(),
-                        }
                         await manager.send_personal_message(
-                            json.dumps(ai_response), websocket
+                            _message_frame(
+                                _AI_RESPONSE_PREFIX,
+                                result,
+                                ',"tools_used":' + orjson.dumps(tools_used).decode(),
+                            ),
+                            websocket,
                         )
 
                     except Exception as e:
                         # 发送错误消息
-                        error_response = {
-                            "type": "error",
-                            "message": f"处理消息时出错: {str(e)}",
-                            "timestamp": datetime.now().isoformat(),
-                        }
                         await manager.send_personal_message(
-                            json.dumps(error_response), websocket
+                            _message_frame(_ERROR_PREFIX, f"处理消息时出错: {str(e)}"),
+                            websocket,
                         )
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
-        print("WebSocket 连接正常断开")
+        logger.debug("WebSocket 连接正常断开")
     except Exception as e:
-        print(f"WebSocket 错误: {e}")
+        logger.warning("WebSocket 错误: {}", e)
         manager.disconnect(websocket)
 
 
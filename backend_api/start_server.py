@@ -2,8 +2,13 @@
 AI 时间管理系统 - 后端 API 启动文件
 
 这个文件用于启动 FastAPI 应用，避免模块重载问题。
+
+开发时设置 UVICORN_RELOAD=1 开启热重载（单进程）；
+生产环境默认单进程，可通过 API_WORKERS 环境变量指定进程数。
 """
 
+import os
+
 import uvicorn
 
 if __name__ == "__main__":
@@ -12,4 +17,23 @@ if __name__ == "__main__":
     print("🔍 ReDoc 文档: http://localhost:8000/redoc")
     print("💚 健康检查: http://localhost:8000/health")
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    reload = os.getenv("UVICORN_RELOAD") == "1"
+    if reload:
+        uvicorn.run(
+            "main:app", host="0.0.0.0", port=8000, reload=True, log_level="info"
+        )
+    else:
+        # uvloop + httptools 由 uvicorn[standard] 提供；auto 在已安装时优先使用，
+        # Windows 等不支持 uvloop 的平台上自动回退到 asyncio
+        # 注意：对话记忆、WebSocket 连接等状态保存在进程内，多进程时各进程互不共享，
+        # 且会同时写同一个数据文件，因此默认单进程
+        workers = int(os.getenv("API_WORKERS", "1"))
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="auto",
+            http="auto",
+            workers=workers,
+            log_level="warning",
+        )
@@ -2,20 +2,34 @@
 任务管理接口实现
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+import msgspec
 
-from .main import DailyTaskCreate, WeeklyTaskCreate, TaskUpdate, time_service
+from .utils import now_iso
+from .main import (
+    DAILY_TASKS_ADAPTER,
+    WEEKLY_TASKS_ADAPTER,
+    DailyTaskCreate,
+    WeeklyTaskCreate,
+    TaskUpdate,
+    msgspec_body,
+    time_service,
+)
 
-router = APIRouter(prefix="/api/tasks", tags=["任务管理"])
+router = APIRouter(
+    prefix="/api/tasks", tags=["任务管理"], default_response_class=ORJSONResponse
+)
 
 
 # ==================== 日任务相关接口 ====================
 
 
 @router.post("/daily")
-async def create_daily_task(task_data: DailyTaskCreate):
+async def create_daily_task(
+    task_data: DailyTaskCreate = Depends(msgspec_body(DailyTaskCreate)),
+):
     """
     创建日任务
 
@@ -45,7 +59,7 @@ async def create_daily_task(task_data: DailyTaskCreate):
             return {
                 "success": True,
                 "message": f"日任务 '{task_data.task_name}' 创建成功",
-                "task_data": task_data.dict(),
+                "task_data": msgspec.structs.asdict(task_data),
             }
         else:
             raise HTTPException(status_code=400, detail="日任务创建失败")
@@ -75,7 +89,7 @@ async def get_daily_tasks(
         return {
             "success": True,
             "date": date_str,
-            "tasks": [task.dict() for task in tasks],
+            "tasks": DAILY_TASKS_ADAPTER.dump_python(tasks),
             "count": len(tasks),
         }
 
@@ -100,35 +114,18 @@ async def update_daily_task(task_name: str, date_str: str, task_update: TaskUpda
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
     try:
-        # 获取现有任务
-        tasks = time_service.get_daily_tasks(date_str)
-        target_task = None
-        for task in tasks:
-            if task.task_name == task_name:
-                target_task = task
-                break
-
-        if not target_task:
-            raise HTTPException(status_code=404, detail=f"未找到任务: {task_name}")
-
-        # 删除旧任务
-        time_service.delete_daily_task(date_str, task_name)
-
-        # 创建更新后的任务
-        updated_data = target_task.dict()
+        # 由服务层原地修改任务并保存一次，无需先删除再重新添加
         update_dict = task_update.dict(exclude_unset=True)
-        updated_data.update(update_dict)
+        success = time_service.update_daily_task(date_str, task_name, update_dict)
 
-        success = time_service.add_daily_task(**updated_data)
+        if not success:
+            raise HTTPException(status_code=404, detail=f"未找到任务: {task_name}")
 
-        if success:
-            return {
-                "success": True,
-                "message": f"日任务 '{task_name}' 更新成功",
-                "updated_data": updated_data,
-            }
-        else:
-            raise HTTPException(status_code=400, detail="日任务更新失败")
+        return {
+            "success": True,
+            "message": f"日任务 '{task_name}' 更新成功",
+            "updated_data": {"task_name": task_name, "date_str": date_str, **update_dict},
+        }
 
     except HTTPException:
         raise
@@ -185,22 +182,13 @@ async def create_weekly_task(task_data: WeeklyTaskCreate):
         raise HTTPException(status_code=500, detail="时间管理服务未初始化")
 
     try:
-        # 转换 priority 字符串为 Priority 枚举
-        from time_planner.new_models import Priority
-
-        priority_map = {
-            "low": Priority.LOW,
-            "medium": Priority.MEDIUM,
-            "high": Priority.HIGH,
-        }
-        priority_enum = priority_map.get(task_data.priority.lower(), Priority.MEDIUM)
-
+        # priority 在请求解析时已转换为 Priority 枚举
         success = time_service.add_weekly_task(
             week_number=task_data.week_number,
             task_name=task_data.task_name,
             description=task_data.description,
             parent_project=task_data.parent_project,
-            priority=priority_enum,
+            priority=task_data.priority,
         )
 
         if success:
@@ -235,7 +223,7 @@ async def get_weekly_tasks(week_number: int = Query(..., description="周数")):
         return {
             "success": True,
             "week_number": week_number,
-            "tasks": [task.dict() for task in tasks],
+            "tasks": WEEKLY_TASKS_ADAPTER.dump_python(tasks),
             "count": len(tasks),
         }
 
@@ -293,7 +281,7 @@ async def get_task_statistics():
         return {
             "success": True,
             "statistics": stats,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
 
     except Exception as e:
@@ -316,7 +304,7 @@ async def export_all_data():
         return {
             "success": True,
             "data": data,
-            "export_time": datetime.now().isoformat(),
+            "export_time": now_iso(),
         }
 
     except Exception as e:
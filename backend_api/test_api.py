@@ -10,12 +10,15 @@ import json
 # API 基础URL
 BASE_URL = "http://localhost:8000"
 
+# 请求时声明支持 gzip，响应由 requests 自动解压
+GZIP_HEADERS = {"Accept-Encoding": "gzip"}
+
 
 def test_health():
     """测试健康检查端点"""
     print("🔍 测试健康检查...")
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = requests.get(f"{BASE_URL}/health", headers=GZIP_HEADERS)
         print(f"状态码: {response.status_code}")
         print(f"响应: {response.json()}")
         return response.status_code == 200
@@ -56,7 +59,7 @@ def test_time_info():
     """测试时间信息端点"""
     print("\n⏰ 测试时间信息...")
     try:
-        response = requests.get(f"{BASE_URL}/api/data/time-info")
+        response = requests.get(f"{BASE_URL}/api/data/time-info", headers=GZIP_HEADERS)
         print(f"状态码: {response.status_code}")
         if response.status_code == 200:
             result = response.json()
@@ -74,6 +77,31 @@ def test_time_info():
         return False
 
 
+def test_gzip_compression():
+    """测试大体积 JSON 响应的 gzip 压缩"""
+    print("\n🗜️ 测试响应压缩...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/data/current", headers=GZIP_HEADERS)
+        print(f"状态码: {response.status_code}")
+        if response.status_code != 200:
+            print(f"❌ 失败: {response.text}")
+            return False
+
+        # 小于 1KB 的响应不压缩
+        encoding = response.headers.get("Content-Encoding")
+        if len(response.content) >= 1024 and encoding != "gzip":
+            print(f"❌ 响应未压缩: Content-Encoding={encoding}")
+            return False
+
+        response.json()
+        print(f"✅ 成功! Content-Encoding={encoding}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 压缩测试失败: {e}")
+        return False
+
+
 def test_task_creation():
     """测试任务创建端点"""
     print("\n📝 测试任务创建...")
@@ -119,6 +147,7 @@ def main():
         ("健康检查", test_health),
         ("聊天消息", test_chat_message),
         ("时间信息", test_time_info),
+        ("响应压缩", test_gzip_compression),
         ("任务创建", test_task_creation),
     ]
 
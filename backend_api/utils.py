@@ -0,0 +1,205 @@
+"""
+后端 API 公共工具
+
+提供各个路由模块共享的辅助函数。
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from time_planner.new_models import Priority, TimeUtils
+
+# ==================== 应用状态访问 ====================
+
+
+def get_ai_agent(request: Request) -> Any:
+    """从应用状态中获取 AI Agent 实例，未初始化时返回 None"""
+    return getattr(request.app.state, "ai_agent", None)
+
+
+def get_time_service(request: Request) -> Any:
+    """从应用状态中获取时间管理服务实例，未初始化时返回 None"""
+    return getattr(request.app.state, "time_service", None)
+
+
+# ==================== 请求字段解析 ====================
+
+# 优先级字符串到枚举的映射，模块加载时构建一次
+_PRIORITY_MAP = {p.value: p for p in Priority}
+
+
+def parse_priority(value: Any) -> Any:
+    """
+    将优先级字符串转换为 Priority 枚举（忽略大小写）
+
+    供请求模型的 mode="before" 校验器使用，非法值抛出 ValueError 以返回 422；
+    非字符串值原样返回，交由字段类型继续校验。
+    """
+    if isinstance(value, str):
+        priority = _PRIORITY_MAP.get(value) or _PRIORITY_MAP.get(value.lower())
+        if priority is None:
+            raise ValueError(f"无效的优先级: {value}")
+        return priority
+    return value
+
+
+# ==================== 时间戳缓存 ====================
+
+# 由后台任务定期刷新的 ISO 时间字符串，避免每个请求都构造 datetime 并格式化
+_NOW_ISO = ""
+
+
+def now_iso() -> str:
+    """
+    获取当前时间的 ISO 字符串
+
+    刷新任务运行时直接返回缓存值（精度约 100 毫秒），未启动时实时计算。
+    """
+    return _NOW_ISO or datetime.now().isoformat(timespec="milliseconds")
+
+
+async def ts_refresher(interval: float = 0.1):
+    """后台循环刷新缓存的时间戳"""
+    global _NOW_ISO
+    try:
+        while True:
+            _NOW_ISO = datetime.now().isoformat(timespec="milliseconds")
+            await asyncio.sleep(interval)
+    finally:
+        # 任务停止后回退到实时计算，避免返回过期时间
+        _NOW_ISO = ""
+
+
+# ==================== 时间信息缓存 ====================
+
+
+@lru_cache(maxsize=1)
+def _time_info_at(second: int) -> Dict[str, Any]:
+    """
+    计算时间信息
+
+    以秒级时间戳作为缓存键，同一秒内的请求复用同一份结果。
+    """
+    time_info = TimeUtils.snapshot()
+    time_info["timestamp"] = now_iso()
+    return time_info
+
+
+def current_time_info() -> Dict[str, Any]:
+    """获取当前时间信息（当前时间、详细时间、本周进度），按秒缓存"""
+    return _time_info_at(int(time.time()))
+
+
+# ==================== 前端导出缓存 ====================
+
+# 缓存有效期（秒），用于兜底未经过服务层保存的数据变更
+EXPORT_CACHE_TTL = 5.0
+
+# (数据版本号, 生成时间, 响应体)
+_EXPORT_CACHE: Optional[Tuple[int, float, bytes]] = None
+
+
+def cached_frontend_export(ai_agent: Any) -> bytes:
+    """
+    获取前端导出数据的响应体
+
+    以时间管理服务的数据版本号作为缓存键，数据未变化且未超过有效期时直接复用上次结果。
+    """
+    global _EXPORT_CACHE
+    version = getattr(ai_agent.time_service, "version", 0)
+    now = time.monotonic()
+    if (
+        _EXPORT_CACHE
+        and _EXPORT_CACHE[0] == version
+        and now - _EXPORT_CACHE[1] < EXPORT_CACHE_TTL
+    ):
+        return _EXPORT_CACHE[2]
+
+    export_data = ai_agent.export_schedule_for_frontend()
+    body = orjson.dumps(
+        {"success": True, "data": export_data, "export_time": now_iso()}
+    )
+    # 导出失败时不缓存，下次请求重新尝试
+    if "error" not in export_data:
+        _EXPORT_CACHE = (version, now, body)
+    return body
+
+
+# ==================== HTTP 缓存 ====================
+
+
+def with_cache_headers(
+    response: Response, max_age: int, stale_while_revalidate: int = 0
+) -> Response:
+    """
+    为响应添加 Cache-Control 和 ETag 头
+
+    ETag 根据响应体计算，已设置 ETag 的响应（如文件响应）保持不变。
+    """
+    cache_control = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+    response.headers["Cache-Control"] = cache_control
+    if "etag" not in response.headers and getattr(response, "body", None):
+        response.headers["ETag"] = f'"{hashlib.md5(response.body).hexdigest()}"'
+    return response
+
+
+class ConditionalGetMiddleware:
+    """
+    条件请求中间件
+
+    GET/HEAD 请求的 If-None-Match 与响应 ETag 一致时，改为返回不带响应体的 304。
+    """
+
+    # 304 响应中保留的响应头
+    _KEEP_HEADERS = (b"etag", b"cache-control", b"vary")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = dict(scope["headers"]).get(b"if-none-match")
+        if not if_none_match:
+            await self.app(scope, receive, send)
+            return
+
+        not_modified = False
+
+        async def send_wrapper(message):
+            nonlocal not_modified
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = message.get("headers", [])
+                etag = dict(headers).get(b"etag")
+                if etag and etag == if_none_match:
+                    not_modified = True
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": 304,
+                            "headers": [
+                                (k, v) for k, v in headers if k in self._KEEP_HEADERS
+                            ],
+                        }
+                    )
+                    return
+            elif message["type"] == "http.response.body" and not_modified:
+                # 丢弃原响应体，仅在最后一块时结束响应
+                if not message.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b""})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,28 @@
+"""
+pytest 全局配置
+
+测试文件不再各自修改 sys.path：直接运行脚本时脚本所在目录（项目根目录）已在 sys.path 中，
+通过 pytest 运行时由本文件保证项目根目录只加入一次。
+
+共享的 fixture 也在此定义，初始化开销较大的对象在每个测试模块中只创建一次；
+各模块使用独立的实例，对话记忆和数据不会在测试文件之间串用。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+_PROJECT_ROOT = str(Path(__file__).parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+
+@pytest.fixture(scope="module")
+def agent():
+    """在同一模块的测试间共享的 Agent 实例，每个模块初始化一次"""
+    from time_planner.new_agent import NewTimeManagementAgent
+
+    shared_agent = NewTimeManagementAgent()
+    yield shared_agent
+    shared_agent.shutdown()
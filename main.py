@@ -19,36 +19,55 @@ AI 时间管理系统 - 主程序入口
 
 import asyncio
 import argparse
+import atexit
+from contextlib import suppress
 import sys
 import os
 from pathlib import Path
 
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
+# 重量级模块（Agent、服务、CLI、loguru）延迟到实际使用时再导入，
+# 使 --help、--check 等路径无需加载整个 Agent 依赖栈
+_LAZY_IMPORTS = {
+    "new_cli_main": ("time_planner.new_cli", "main"),
+    "NewTimeManagementAgent": ("time_planner.new_agent", "NewTimeManagementAgent"),
+    "TimeManagementService": ("time_planner.new_services", "TimeManagementService"),
+    "logger": ("loguru", "logger"),
+}
 
-from time_planner.new_cli import main as new_cli_main
-from time_planner.new_agent import NewTimeManagementAgent
-from time_planner.new_services import TimeManagementService
-from loguru import logger
+
+def __getattr__(name: str):
+    """按需导入模块级名称（PEP 562），保持 main.logger 等外部访问方式不变"""
+    if name in _LAZY_IMPORTS:
+        import importlib
+
+        module_name, attr = _LAZY_IMPORTS[name]
+        value = getattr(importlib.import_module(module_name), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def setup_logging(debug: bool = False):
     """设置日志配置"""
-    # 创建日志目录
-    os.makedirs("logs", exist_ok=True)
+    from loguru import logger
 
     # 清除默认日志处理器
     logger.remove()
 
-    # 设置文件日志
+    # 设置文件日志：delay=True 时首条日志写入才创建日志目录并打开文件，
+    # --check 等不产生日志的运行路径不会打开日志文件
+    # 文件写入交由后台线程并按块缓冲，不阻塞 Agent 所在线程；退出时刷新队列
     logger.add(
         "logs/app.log",
         rotation="10 MB",
         retention="7 days",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} | {message}",
         level="DEBUG" if debug else "INFO",
+        enqueue=True,
+        buffering=8192,
+        delay=True,
     )
+    atexit.register(logger.complete)
 
     # 设置控制台日志（只显示警告和错误）
     if debug:
@@ -63,62 +82,71 @@ def setup_logging(debug: bool = False):
         )
 
 
-def print_banner():
-    """打印系统横幅"""
-    banner = """
-    ╔══════════════════════════════════════════════════════════════╗
-    ║                      🕒 AI 时间管理系统                        ║
-    ║                                                              ║
-    ║              让智能助手帮您合理安排时间                         ║
-    ║                                                              ║
-    ║  功能特色:                                                    ║
-    ║  • 自然语言任务解析                                           ║
-    ║  • 智能时间规划                                               ║
-    ║  • 冲突检测与自动调整                                         ║
-    ║  • 个性化建议                                                 ║
-    ║  • 思维链推理                                                 ║
-    ╚══════════════════════════════════════════════════════════════╝
-    """
-    print(banner)
+# 必需依赖：(模块名, pip 包名)
+_REQUIRED_MODULES = (
+    ("pydantic", "pydantic"),
+    ("dotenv", "python-dotenv"),
+    ("loguru", "loguru"),
+)
 
+# 依赖检查通过后写入的标记文件目录
+_DEPS_STAMP_DIR = Path("~/.cache/ai-timeflow/deps_ok").expanduser()
 
-def check_dependencies():
-    """检查依赖环境"""
-    missing_deps = []
 
-    try:
-        import pydantic
-    except ImportError:
-        missing_deps.append("pydantic")
+def _deps_stamp() -> Path:
+    """依赖检查标记文件，以解释器版本、环境路径和 requirements.txt 修改时间作为键"""
+    import hashlib
 
     try:
-        import dotenv
-    except ImportError:
-        missing_deps.append("python-dotenv")
+        req_mtime = os.path.getmtime(Path(__file__).with_name("requirements.txt"))
+    except OSError:
+        req_mtime = 0
+    key = hashlib.sha1(f"{sys.version}|{sys.prefix}|{req_mtime}".encode()).hexdigest()
+    return _DEPS_STAMP_DIR / key
 
-    try:
-        import loguru
-    except ImportError:
-        missing_deps.append("loguru")
 
-    # 检查环境变量
-    env_file = Path(".env")
-    if not env_file.exists():
+def check_dependencies(use_cache: bool = True):
+    """
+    检查依赖环境
+
+    检查通过后写入标记文件，之后在同一环境中启动时跳过导入检查；
+    use_cache 为 False 时（如 --check）总是重新检查。
+    """
+    # 检查环境变量（环境中已配置 API 密钥时无需 .env 文件）
+    if not os.environ.get("DEEPSEEK_API_KEY") and not Path(".env").exists():
         print("⚠️  警告: 未找到 .env 文件，请确保已配置 API 密钥")
 
+    stamp = _deps_stamp()
+    if use_cache and stamp.exists():
+        return True
+
+    # 只查找模块规格而不执行模块代码
+    from importlib.util import find_spec
+
+    missing_deps = [
+        package
+        for module_name, package in _REQUIRED_MODULES
+        if find_spec(module_name) is None
+    ]
+
     if missing_deps:
         print(f"❌ 缺少依赖包: {', '.join(missing_deps)}")
         print("请运行: pip install -r requirements.txt")
         return False
 
+    try:
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.touch()
+    except OSError:
+        # 缓存目录不可写时仅跳过缓存
+        pass
+
     return True
 
 
 def check_mcp_server():
     """检查 MCP 服务器是否可用"""
-    import subprocess
-    import os
-    from pathlib import Path
+    import shutil
 
     try:
         # 检查本地 MCP 服务器文件
@@ -126,24 +154,12 @@ def check_mcp_server():
         if mcp_js_path.exists():
             print("✅ 本地 MCP Sequential Thinking 服务器已编译")
 
-            # 检查是否可以运行 node
-            try:
-                result = subprocess.run(
-                    ["node", "--version"],
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                )
-                if result.returncode == 0:
-                    print(f"✅ Node.js 已安装: {result.stdout.strip()}")
-                    return True
-                else:
-                    print("❌ Node.js 无法运行")
-                    return False
-            except subprocess.TimeoutExpired:
-                print("⚠️  检查 Node.js 超时")
-                return False
-            except FileNotFoundError:
+            # 直接在 PATH 中查找 node，无需启动子进程
+            node_path = shutil.which("node")
+            if node_path:
+                print(f"✅ Node.js 已安装: {node_path}")
+                return True
+            else:
                 print("❌ 未找到 Node.js，请确保 Node.js 已安装并在 PATH 中")
                 return False
         else:
@@ -159,14 +175,20 @@ def check_mcp_server():
 
 async def run_interactive_mode():
     """运行交互模式"""
+    from time_planner.new_cli import main as new_cli_main
+
     print("🚀 启动交互模式...")
     await new_cli_main()
 
 
 async def run_demo_mode():
     """运行演示模式"""
+    from loguru import logger
+    from time_planner.new_agent import NewTimeManagementAgent
+
     print("🎯 演示模式")
 
+    agent = None
     try:
         print("\\n正在初始化新时间管理系统...")
 
@@ -196,8 +218,9 @@ async def run_demo_mode():
             except Exception as e:
                 print(f"处理失败: {e}")
 
-            # 等待一下
-            await asyncio.sleep(1)
+            # 终端中稍作停顿便于阅读，脚本/CI 运行时不等待
+            if sys.stdout.isatty():
+                await asyncio.sleep(0.1)
 
         print("\\n🎉 演示完成！")
 
@@ -208,18 +231,190 @@ async def run_demo_mode():
             print(f"  {key}: {value}")
 
     except Exception as e:
-        logger.error(f"演示模式失败: {e}")
+        logger.opt(lazy=True).error("演示模式失败: {e}", e=lambda: e)
         print(f"❌ 演示失败: {e}")
     finally:
         print("\\n🔄 清理资源...")
+        # shutdown 为同步方法；只忽略普通异常，KeyboardInterrupt 等仍可中断退出
+        if agent is not None:
+            with suppress(Exception):
+                agent.shutdown()
+
+
+# 守护进程监听的 Unix 套接字路径
+DAEMON_SOCKET = os.getenv("AI_TIMEFLOW_SOCK", "/tmp/ai-timeflow.sock")
+
+# 套接字单行消息的长度上限（AI 回复可能较长）
+_DAEMON_LINE_LIMIT = 16 * 1024 * 1024
+
+
+async def run_daemon_mode():
+    """
+    运行守护进程模式
+
+    常驻进程只初始化一次 Agent，通过 Unix 套接字接收 --client 转发的消息，
+    后续调用无需重复导入依赖和初始化 Agent。
+    """
+    import json
+
+    # Windows 等平台的 asyncio 不提供 Unix 套接字接口
+    if not hasattr(asyncio, "start_unix_server"):
+        print("❌ 当前平台不支持守护进程模式（需要 Unix 套接字）")
+        return
+
+    from time_planner.new_agent import NewTimeManagementAgent
+
+    # 已有守护进程在运行时不抢占套接字
+    try:
+        _, writer = await asyncio.open_unix_connection(DAEMON_SOCKET)
+        writer.close()
+        print(f"⚠️  守护进程已在运行: {DAEMON_SOCKET}")
+        return
+    except (OSError, AttributeError):
+        pass
+
+    print("正在初始化新时间管理系统...")
+    agent = NewTimeManagementAgent()
+    # Agent 的对话记忆不支持并发修改，请求逐个处理
+    agent_lock = asyncio.Lock()
+
+    async def handle(reader, writer):
+        try:
+            request = json.loads(await reader.readline())
+            async with agent_lock:
+                response = await agent.process_user_request(request["message"])
+            reply = {"response": response, "exit_code": 0}
+        except Exception as e:
+            reply = {"response": f"处理失败: {e}", "exit_code": 1}
         try:
-            await agent.shutdown()
-        except:
-            pass
+            writer.write(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
 
+    try:
+        # 清理上次异常退出遗留的套接字文件
+        if os.path.exists(DAEMON_SOCKET):
+            os.unlink(DAEMON_SOCKET)
 
-def main():
-    """主函数"""
+        server = await asyncio.start_unix_server(
+            handle, path=DAEMON_SOCKET, limit=_DAEMON_LINE_LIMIT
+        )
+        print(f"✅ 守护进程已启动: {DAEMON_SOCKET}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        if os.path.exists(DAEMON_SOCKET):
+            os.unlink(DAEMON_SOCKET)
+        # 关闭 Agent（停止 MCP 子进程）；只忽略普通异常
+        with suppress(Exception):
+            agent.shutdown()
+
+
+async def run_client_mode(message: str, debug: bool = False) -> int:
+    """
+    将消息转发给守护进程并输出回复
+
+    守护进程未运行（或系统不支持 Unix 套接字）时回退到进程内处理。
+
+    Args:
+        message: 要发送的消息
+        debug: 回退到进程内处理时是否启用调试日志
+
+    Returns:
+        int: 退出码
+    """
+    import json
+
+    try:
+        reader, writer = await asyncio.open_unix_connection(
+            DAEMON_SOCKET, limit=_DAEMON_LINE_LIMIT
+        )
+    except (OSError, AttributeError):
+        from time_planner.new_agent import NewTimeManagementAgent
+
+        # 进程内处理会初始化 Agent，先配置日志，否则 loguru 默认把 DEBUG 日志全部输出到控制台
+        setup_logging(debug=debug)
+        agent = NewTimeManagementAgent()
+        try:
+            print(await agent.process_user_request(message))
+            return 0
+        except Exception as e:
+            print(f"处理失败: {e}")
+            return 1
+
+    try:
+        writer.write(json.dumps({"message": message}, ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+        line = await reader.readline()
+    except OSError as e:
+        print(f"与守护进程通信失败: {e}")
+        return 1
+    finally:
+        writer.close()
+
+    # 守护进程在回复前关闭连接（如进程退出）时读到空行
+    if not line:
+        print("处理失败: 守护进程未返回回复")
+        return 1
+    try:
+        reply = json.loads(line)
+    except ValueError as e:
+        print(f"处理失败: 守护进程回复格式错误: {e}")
+        return 1
+
+    print(reply["response"])
+    return reply["exit_code"]
+
+
+def _install_fast_event_loop():
+    """
+    安装更快的事件循环实现
+
+    依次尝试 uringcore（Linux io_uring）和 uvloop，均未安装时保持标准 asyncio 事件循环。
+    """
+    for module_name in ("uringcore", "uvloop"):
+        try:
+            module = __import__(module_name)
+        except ImportError:
+            continue
+        asyncio.set_event_loop_policy(module.EventLoopPolicy())
+        return module_name
+    return None
+
+
+# 仅包含这些开关（或无参数）时，无需构建完整的 argparse 解析器
+_FAST_FLAGS = {
+    "--demo",
+    "--check",
+    "--debug",
+    "--no-banner",
+    "--daemon",
+    "--no-fast-loop",
+}
+
+
+def _sniff_args(argv):
+    """
+    快速识别常用参数组合
+
+    参数均为已知开关时直接构造结果，否则返回 None 交由 argparse 处理（包括 --help 和错误提示）。
+    """
+    if not set(argv) <= _FAST_FLAGS:
+        return None
+    return argparse.Namespace(
+        demo="--demo" in argv,
+        check="--check" in argv,
+        debug="--debug" in argv,
+        no_banner="--no-banner" in argv,
+        daemon="--daemon" in argv,
+        client=None,
+        no_fast_loop="--no-fast-loop" in argv,
+    )
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """构建完整的命令行参数解析器"""
     parser = argparse.ArgumentParser(
         description="AI 时间管理系统",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -229,6 +424,8 @@ def main():
   python main.py --demo            # 运行演示模式  
   python main.py --check           # 检查系统环境
   python main.py --debug           # 开启调试模式
+  python main.py --daemon          # 启动常驻守护进程
+  python main.py --client "现在几点了？"  # 通过守护进程发送消息
         """,
     )
 
@@ -240,19 +437,90 @@ def main():
 
     parser.add_argument("--no-banner", action="store_true", help="不显示启动横幅")
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--daemon", action="store_true", help="启动常驻守护进程（Unix 套接字）"
+    )
+
+    parser.add_argument(
+        "--no-fast-loop",
+        action="store_true",
+        help="使用标准 asyncio 事件循环（不使用 uvloop 等加速实现，便于调试）",
+    )
+
+    parser.add_argument(
+        "--client",
+        metavar="MESSAGE",
+        help="将消息发送给守护进程处理，守护进程未运行时在当前进程处理",
+    )
+
+    return parser
+
+
+# 帮助文本缓存目录（ArgumentParser 含局部函数，无法直接 pickle，改为缓存格式化后的帮助文本）
+_HELP_CACHE_DIR = Path("~/.cache/ai-timeflow/help").expanduser()
+
+
+def _print_cached_help():
+    """
+    输出 --help 帮助文本
+
+    以本文件修改时间和终端宽度作为缓存键，命中时无需构建解析器；未命中时生成并写入缓存。
+    """
+    import shutil
+
+    width = shutil.get_terminal_size().columns
+    cache_file = _HELP_CACHE_DIR / f"{os.path.getmtime(__file__)}-{width}.txt"
+    try:
+        help_text = cache_file.read_text(encoding="utf-8")
+    except OSError:
+        help_text = _build_parser().format_help()
+        with suppress(OSError):
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(help_text, encoding="utf-8")
+    sys.stdout.write(help_text)
+
+
+def _preload_agent_modules():
+    """预先导入 Agent 相关模块（在后台线程中执行，失败时留给正式导入处理）"""
+    with suppress(Exception):
+        import time_planner.new_agent  # noqa: F401
+
+
+def main():
+    """主函数"""
+    argv = sys.argv[1:]
+    if argv in (["-h"], ["--help"]):
+        _print_cached_help()
+        return
+
+    args = _sniff_args(argv) or _build_parser().parse_args()
+
+    # 客户端模式只转发消息，不加载横幅；仅在回退到进程内处理时配置日志
+    if args.client is not None:
+        sys.exit(asyncio.run(run_client_mode(args.client, debug=args.debug)))
+
+    # 需要 Agent 的模式在后台线程预先导入 Agent 模块，与横幅输出、环境检查并行；
+    # 之后的 import 语句直接命中 sys.modules
+    if not args.check:
+        import threading
+
+        threading.Thread(
+            target=_preload_agent_modules, name="preload", daemon=True
+        ).start()
 
     # 设置日志
     setup_logging(debug=args.debug)
 
     # 显示横幅
     if not args.no_banner:
+        from time_planner._banner import print_banner
+
         print_banner()
 
     # 检查环境
     if args.check:
         print("🔍 检查系统环境...")
-        deps_ok = check_dependencies()
+        deps_ok = check_dependencies(use_cache=False)
         mcp_ok = check_mcp_server()
 
         if deps_ok and mcp_ok:
@@ -267,8 +535,15 @@ def main():
         print("请运行: python main.py --check 查看详细信息")
         sys.exit(1)
 
+    # 使用 uvloop 等更快的事件循环（可通过 --no-fast-loop 关闭）
+    if not args.no_fast_loop:
+        _install_fast_event_loop()
+
     try:
-        if args.demo:
+        if args.daemon:
+            # 守护进程模式
+            asyncio.run(run_daemon_mode())
+        elif args.demo:
             # 演示模式
             asyncio.run(run_demo_mode())
         else:
@@ -278,7 +553,10 @@ def main():
     except KeyboardInterrupt:
         print("\\n\\n👋 用户中断，程序退出")
     except Exception as e:
-        logger.error(f"程序运行失败: {e}")
+        from loguru import logger
+
+        # 延迟格式化，只有日志级别生效时才生成消息
+        logger.opt(lazy=True).error("程序运行失败: {e}", e=lambda: e)
         print(f"\\n❌ 程序运行失败: {e}")
         if args.debug:
             import traceback
@@ -4,28 +4,17 @@
 """
 
 import asyncio
-import sys
 import os
-from pathlib import Path
-
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
 
 from time_planner.new_agent import NewTimeManagementAgent
-from time_planner.new_services import TimeManagementService
 
 
-async def test_ai_schedule_saving():
-    """测试AI生成时间表的保存功能"""
+async def test_ai_schedule_saving(agent: NewTimeManagementAgent):
+    """测试AI生成时间表的保存功能（agent 由 conftest.py 的共享 fixture 提供）"""
 
     print("🧪 测试AI生成时间表保存功能")
     print("=" * 60)
 
-    # 初始化服务和Agent
-    service = TimeManagementService("test_ai_schedule.json")
-    agent = NewTimeManagementAgent()  # Agent 会自己初始化服务
-
     # 模拟一个简单的JSON响应（避免调用API）
     mock_json_response = {
         "daily_schedule": [
@@ -132,12 +121,10 @@ async def test_ai_schedule_saving():
 
     print("\\n🏁 测试完成！")
 
-    # 关闭agent
-    try:
-        await agent.shutdown()
-    except:
-        pass
-
 
 if __name__ == "__main__":
-    asyncio.run(test_ai_schedule_saving())
+    agent = NewTimeManagementAgent()  # Agent 会自己初始化服务
+    try:
+        asyncio.run(test_ai_schedule_saving(agent))
+    finally:
+        agent.shutdown()
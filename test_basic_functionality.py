@@ -5,11 +5,6 @@
 
 import sys
 import os
-from pathlib import Path
-
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
 
 from time_planner.new_services import TimeManagementService
 from time_planner.new_models import Priority
@@ -146,10 +141,17 @@ def test_basic_functionality():
     # 验证JSON格式
     print("\\n🔍 验证JSON数据格式...")
     try:
-        import json
+        try:
+            import orjson
+
+            loads = orjson.loads
+        except ImportError:
+            import json
+
+            loads = json.loads
 
-        with open(export_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(export_file, "rb") as f:
+            data = loads(f.read())
 
         print("✅ JSON格式验证通过")
         print(f"  包含字段：{list(data.keys())}")
@@ -6,29 +6,38 @@
 import asyncio
 import sys
 import os
-from pathlib import Path
 
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
+import pytest
 
 from time_planner.new_agent import NewTimeManagementAgent
 from time_planner.new_services import TimeManagementService
 from loguru import logger
 
 
-async def test_new_system():
-    """测试新时间管理系统"""
-
-    print("🚀 启动新时间管理系统测试")
-    print("=" * 60)
-
-    # 清理旧数据文件
-    for file in ["time_management_data.json", "conversation_memory.json"]:
+def remove_old_data_files():
+    """清理旧数据文件，须在创建 Agent 之前执行，否则 Agent 已加载旧数据和对话记忆"""
+    for file in [
+        "time_management_data.json",
+        "conversation_memory.json",
+        "conversation_memory.jsonl",
+    ]:
         if os.path.exists(file):
             os.remove(file)
             print(f"🗑️ 已清理旧文件：{file}")
 
+
+@pytest.fixture(scope="module", autouse=True)
+def _clean_data_files():
+    """模块级自动 fixture，先于同作用域的 agent fixture 执行"""
+    remove_old_data_files()
+
+
+async def test_new_system(agent: NewTimeManagementAgent):
+    """测试新时间管理系统（agent 由 conftest.py 的共享 fixture 在清理旧数据后创建）"""
+
+    print("🚀 启动新时间管理系统测试")
+    print("=" * 60)
+
     # 测试服务层
     print("\\n📋 测试时间管理服务...")
     service = TimeManagementService("test_time_data.json")
@@ -77,7 +86,6 @@ async def test_new_system():
 
     # 测试Agent
     print("\\n🤖 测试AI Agent...")
-    agent = NewTimeManagementAgent()
     agent.initialize()
 
     # 测试简单对话
@@ -107,9 +115,6 @@ async def test_new_system():
     print(f"  总消息数：{final_status['total_messages']}")
     print(f"  时间数据：{final_status['time_service_stats']}")
 
-    # 关闭Agent
-    agent.shutdown()
-
     # 导出测试数据
     export_file = service.export_json("test_export.json")
     if export_file:
@@ -124,7 +129,12 @@ if __name__ == "__main__":
     logger.add(sys.stderr, level="INFO", format="<level>{level}</level> | {message}")
 
     try:
-        asyncio.run(test_new_system())
+        remove_old_data_files()
+        agent = NewTimeManagementAgent()
+        try:
+            asyncio.run(test_new_system(agent))
+        finally:
+            agent.shutdown()
     except KeyboardInterrupt:
         print("\\n🛑 测试被用户中断")
     except Exception as e:
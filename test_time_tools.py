@@ -4,99 +4,113 @@
 """
 
 import sys
-from pathlib import Path
-
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
 
 from time_planner.new_services import TimeManagementService
 from time_planner.new_models import TimeUtils
-import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
 
 
 def test_time_tools():
     """测试所有时间工具"""
 
-    print("🕐 时间管理系统 - 时间查询工具测试")
-    print("=" * 60)
+    # 输出先收集到列表，结束时一次性写出，避免大量零散的 print
+    out = []
+    p = out.append
+
+    p("🕐 时间管理系统 - 时间查询工具测试")
+    p("=" * 60)
 
     # 初始化服务
     service = TimeManagementService("test_time_tools.json")
 
-    print("\n📅 基础时间信息：")
+    p("\n📅 基础时间信息：")
     current_time = service.get_current_time_info()
     for key, value in current_time.items():
-        print(f"  {key}: {value}")
+        p(f"  {key}: {value}")
 
-    print("\n🔍 详细时间信息：")
+    p("\n🔍 详细时间信息：")
     detailed_time = service.get_detailed_time_info()
     for key, value in detailed_time.items():
-        print(f"  {key}: {value}")
+        p(f"  {key}: {value}")
 
-    print("\n⏰ 距离下一个时间段：")
+    p("\n⏰ 距离下一个时间段：")
     next_period = service.get_time_until_next_period()
     for key, value in next_period.items():
-        print(f"  {key}: {value}")
+        p(f"  {key}: {value}")
 
-    print("\n📊 本周进度：")
+    p("\n📊 本周进度：")
     week_progress = service.get_week_progress()
     for key, value in week_progress.items():
-        print(f"  {key}: {value}")
+        p(f"  {key}: {value}")
 
-    print("\n🗓️ 相对日期解析测试：")
+    p("\n🗓️ 相对日期解析测试：")
     test_dates = ["今天", "明天", "昨天", "后天", "前天"]
-    for date_term in test_dates:
-        parsed = service.parse_relative_date(date_term)
-        date_info = service.get_date_info(parsed)
-        print(f"  {date_term} -> {parsed} ({date_info.get('weekday_chinese', '未知')})")
+    # 每个相对日期只解析一次，打印和导出共用结果
+    relative_dates = {term: service.parse_relative_date(term) for term in test_dates}
+    date_infos = {
+        term: service.get_date_info(parsed) for term, parsed in relative_dates.items()
+    }
+    for date_term, date_info in date_infos.items():
+        p(
+            f"  {date_term} -> {relative_dates[date_term]} ({date_info.get('weekday_chinese', '未知')})"
+        )
 
-    print("\n📍 指定日期信息：")
+    p("\n📍 指定日期信息：")
     test_specific_dates = ["2025-07-14", "2025-07-20", "2025-12-31"]
     for date_str in test_specific_dates:
         date_info = service.get_date_info(date_str)
         if "error" not in date_info:
-            print(
+            p(
                 f"  {date_str}: {date_info['weekday_chinese']}, 年第{date_info['day_of_year']}天, 周末: {'是' if date_info['is_weekend'] else '否'}"
             )
         else:
-            print(f"  {date_str}: {date_info['error']}")
+            p(f"  {date_str}: {date_info['error']}")
 
-    print("\n💾 时间工具数据导出：")
+    p("\n💾 时间工具数据导出：")
     time_data = {
         "current_time": current_time,
         "detailed_time": detailed_time,
         "next_period": next_period,
         "week_progress": week_progress,
-        "relative_dates": {
-            date: service.parse_relative_date(date) for date in test_dates
-        },
+        "relative_dates": relative_dates,
     }
 
-    with open("time_tools_export.json", "w", encoding="utf-8") as f:
-        json.dump(time_data, f, ensure_ascii=False, indent=2)
-    print("  ✅ 时间数据已导出到：time_tools_export.json")
-
-    print("\n🎯 实用场景测试：")
-    print("  场景1：用户询问当前时间")
-    print(
+    # 复用上面已获取的结果，一次性序列化后写入
+    if orjson is not None:
+        with open("time_tools_export.json", "wb") as f:
+            f.write(orjson.dumps(time_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open("time_tools_export.json", "w", encoding="utf-8") as f:
+            json.dump(time_data, f, ensure_ascii=False, indent=2)
+    p("  ✅ 时间数据已导出到：time_tools_export.json")
+
+    p("\n🎯 实用场景测试：")
+    p("  场景1：用户询问当前时间")
+    p(
         f"    回答：现在是 {detailed_time['formatted_time']} ({detailed_time['weekday_chinese']} {detailed_time['time_period']})"
     )
 
-    print("  场景2：用户询问今天是否周末")
-    print(
+    p("  场景2：用户询问今天是否周末")
+    p(
         f"    回答：今天是{current_time['weekday_chinese']}，{'是' if current_time['is_weekend'] else '不是'}周末"
     )
 
-    print("  场景3：用户询问本周过了多少")
-    print(
+    p("  场景3：用户询问本周过了多少")
+    p(
         f"    回答：本周已过去 {week_progress['days_passed']}/{7} 天，进度 {week_progress['progress_percentage']}%"
     )
 
-    print("  场景4：用户询问距离下个时间段还有多久")
-    print(f"    回答：{next_period['message']}")
+    p("  场景4：用户询问距离下个时间段还有多久")
+    p(f"    回答：{next_period['message']}")
+
+    p("\n🏁 时间工具测试完成！")
 
-    print("\n🏁 时间工具测试完成！")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
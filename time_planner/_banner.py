@@ -0,0 +1,46 @@
+"""
+系统横幅
+
+横幅仅在命令行启动且输出为终端时才需要，独立成模块以便按需导入。
+"""
+
+import sys
+from functools import lru_cache
+
+_BANNER = """
+    ╔══════════════════════════════════════════════════════════════╗
+    ║                      🕒 AI 时间管理系统                        ║
+    ║                                                              ║
+    ║              让智能助手帮您合理安排时间                         ║
+    ║                                                              ║
+    ║  功能特色:                                                    ║
+    ║  • 自然语言任务解析                                           ║
+    ║  • 智能时间规划                                               ║
+    ║  • 冲突检测与自动调整                                         ║
+    ║  • 个性化建议                                                 ║
+    ║  • 思维链推理                                                 ║
+    ╚══════════════════════════════════════════════════════════════╝
+    """
+
+
+@lru_cache(maxsize=1)
+def _banner_bytes() -> bytes:
+    """横幅的 UTF-8 编码，首次使用时编码一次"""
+    return (_BANNER + "\n").encode("utf-8")
+
+
+def print_banner():
+    """打印系统横幅（输出不是终端时跳过）"""
+    if not sys.stdout.isatty():
+        return
+
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None or (sys.stdout.encoding or "").lower().replace("-", "") != "utf8":
+        # 非 UTF-8 终端（如 GBK 控制台）交由 print 按终端编码输出
+        print(_BANNER)
+        return
+
+    # 先刷新文本层缓冲，保证输出顺序
+    sys.stdout.flush()
+    buffer.write(_banner_bytes())
+    buffer.flush()
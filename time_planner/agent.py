@@ -13,8 +13,14 @@
 """
 
 import os
+import re
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import attrgetter
+from uuid import UUID
 from datetime import date as Date
+from datetime import time as Time
 from typing import List, Dict, Any, Optional, Tuple
 import json
 from dotenv import load_dotenv
@@ -23,9 +29,10 @@ from loguru import logger
 # PydanticAI 相关导入
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.providers.openai import OpenAIProvider
 
-# OpenAI 客户端用于DeepSeek多轮对话
-from openai import OpenAI
+# OpenAI 异步客户端用于DeepSeek多轮对话，等待响应时不阻塞事件循环
+from openai import AsyncOpenAI
 
 from .models import TimeSlot, TaskType, Priority, UserPreferences
 from .services import TimeSlotService, ScheduleService, PlanningService
@@ -36,86 +43,22 @@ from .memory import ConversationMemory, MessageType, MessageImportance
 load_dotenv()
 
 
-class TimeManagementAgent:
-    """时间管理 AI Agent - 核心智能规划助手"""
-
-    def __init__(self):
-        """初始化时间管理 Agent"""
-
-        # 设置环境变量（PydanticAI 会自动读取）
-        os.environ["OPENAI_API_KEY"] = os.getenv("DEEPSEEK_API_KEY", "")
-        os.environ["OPENAI_BASE_URL"] = os.getenv(
-            "DEEPSEEK_API_BASE", "https://api.deepseek.com/v1"
-        )
-
-        # 初始化 AI 模型
-        self.model = OpenAIModel(model_name="deepseek-chat")
-
-        # 初始化 DeepSeek 客户端（用于多轮对话）
-        self.deepseek_client = OpenAI(
-            api_key=os.getenv("DEEPSEEK_API_KEY"),
-            base_url=os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com"),
-        )
-
-        # DeepSeek 多轮对话消息历史
-        self.conversation_messages = []
-
-        # 初始化服务组件
-        self.slot_service = TimeSlotService()
-        self.schedule_service = ScheduleService(self.slot_service)
-        self.planning_service = PlanningService(self.schedule_service)
-
-        # 初始化简化的 MCP 客户端
-        self.mcp_client = SimpleMCPClient()
-        self.thinking_client: Optional[SimpleMCPClient] = None
-
-        # 初始化对话记忆管理器
-        self.memory = ConversationMemory(
-            memory_file="conversation_memory.json",
-            max_recent_messages=15,  # 保留最近15条消息
-            max_total_messages=80,  # 总共最多80条消息
-            summary_threshold=40,  # 40条消息后开始摘要
-        )
-
-        # 创建 PydanticAI Agent（用于工具调用）
-        self.agent = Agent(
-            model=self.model, system_prompt=self._get_system_prompt(), retries=2
-        )
+@dataclass(frozen=True)
+class _DeepSeekConfig:
+    """DeepSeek 接口配置"""
 
-        # 注册工具
-        self._register_tools()
+    api_key: str
+    base_url: str
 
-        logger.info("时间管理 Agent 初始化完成")
-
-    def initialize(self) -> bool:
-        """初始化 Agent（启动 MCP 服务等）"""
-        try:
-            # 尝试初始化简化的 MCP 客户端
-            logger.info("正在初始化 MCP 服务...")
-            if self.mcp_client.start_and_initialize():
-                self.thinking_client = self.mcp_client
-                logger.info("MCP 思维链服务已启用")
-            else:
-                logger.warning("MCP 服务初始化失败，将以基础模式运行")
-                self.thinking_client = None
 
-            logger.info("Agent 初始化完成")
-            return True
+# 模块导入时读取一次，创建 Agent 实例时不再读取或修改环境变量
+_DEEPSEEK_CONFIG = _DeepSeekConfig(
+    api_key=os.getenv("DEEPSEEK_API_KEY", ""),
+    base_url=os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com"),
+)
 
-        except Exception as e:
-            logger.warning(f"MCP 服务初始化失败: {e}，将以基础模式运行")
-            self.thinking_client = None
-            return True  # 即使 MCP 失败，Agent 仍可工作
-
-    def shutdown(self):
-        """关闭 Agent"""
-        if self.mcp_client:
-            self.mcp_client.stop()
-        logger.info("Agent 已关闭")
-
-    def _get_system_prompt(self) -> str:
-        """获取系统提示词"""
-        return """
+# 系统提示词为固定内容，作为对话的第一条消息保持不变，便于上游复用前缀缓存
+SYSTEM_PROMPT = """
 你是一个专业的时间管理助手，负责帮助用户制定合理的时间规划。
 
 你的主要能力包括：
@@ -130,7 +73,7 @@ class TimeManagementAgent:
 9. **智能对话记忆：记住用户的偏好和历史操作**
 
 🧠 **记忆使用原则**：
-- **系统提示词末尾会提供完整的对话历史记录**
+- **系统提示词之后的系统消息会提供完整的对话历史记录**
 - **当用户询问之前提到的信息时，请直接从历史记录中查找答案**
 - **特别注意标记为🔥的重要用户信息**
 - **不要说"无法查询"或"无法获取"，而要仔细查看提供的历史记录**
@@ -223,12 +166,264 @@ class TimeManagementAgent:
 请始终保持友好、专业的态度，并提供实用的建议。利用记忆功能为用户提供更加个性化和连贯的服务体验。
 """
 
-    def _register_tools(self):
-        """注册 Agent 可用的工具"""
+# 任务描述解析用的预编译模式，每类关键词只需一次扫描
+# 时长须为独立的词（如 "2小时"、"30分钟"），多个时以最后一个为准
+_DURATION_PATTERN = re.compile(r"(?<!\S)(?:(\d+(?:\.\d+)?)小时|(\d+)分钟)(?!\S)")
+_HIGH_PRIORITY_PATTERN = re.compile("紧急|急|重要")
+_LOW_PRIORITY_PATTERN = re.compile("低优先级|不急|有空时")
+_FUTURE_DEADLINE_PATTERN = re.compile("明天|下周|后天")
+_TODAY_DEADLINE_PATTERN = re.compile("今天|现在|马上")
+
+# 从用户消息中提取名字的预编译模式，按顺序尝试，靠前的模式优先
+_NAME_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"我叫(.+?)(?:，|。|$)",
+        r"我的名字(?:是|叫)(.+?)(?:，|。|$)",
+        r"我是(.+?)(?:，|。|$)",
+        r"叫我(.+?)(?:，|。|$)",
+    )
+)
+
+# 根据描述直接创建时间安排的规则表：(需全部出现的关键词, 开始时间, 时间段模板)
+# 新增预设安排只需在此添加一条规则
+_SCHEDULE_RULES = (
+    (
+        ("五点左右去吃饭",),
+        "17:00",
+        {
+            "title": "吃饭",
+            "duration_minutes": 30,
+            "task_type": "fixed",
+            "priority": "medium",
+        },
+    ),
+    (
+        ("休息一下", "吃完"),
+        "17:30",
+        {
+            "title": "休息",
+            "duration_minutes": 30,
+            "task_type": "flexible",
+            "priority": "low",
+        },
+    ),
+    (
+        ("洗个澡", "一个小时"),
+        "18:00",
+        {
+            "title": "洗澡",
+            "duration_minutes": 60,
+            "task_type": "fixed",
+            "priority": "medium",
+        },
+    ),
+    (
+        ("敲代码", "一个小时以上"),
+        "19:00",
+        {
+            "title": "敲代码",
+            "duration_minutes": 90,  # 1.5小时
+            "task_type": "fixed",
+            "priority": "high",
+        },
+    ),
+    (
+        ("玩游戏",),
+        "20:30",
+        {
+            "title": "玩游戏",
+            "duration_minutes": 60,
+            "task_type": "flexible",
+            "priority": "low",
+        },
+    ),
+)
+
+
+# 时间段排序键
+_slot_start = attrgetter("start_time")
+
+# 任务类型、优先级字符串到枚举的映射
+_TASK_TYPE = {"fixed": TaskType.FIXED}
+_PRIORITY = {p.name.lower(): p for p in Priority}
+
+
+def _to_priority(priority: str) -> Priority:
+    """解析优先级字符串（忽略大小写），无法识别时为中优先级"""
+    return (
+        _PRIORITY.get(priority) or _PRIORITY.get(priority.lower()) or Priority.MEDIUM
+    )
+
+
+@lru_cache(maxsize=4096)
+def _parse_day(date_str: str) -> datetime:
+    """解析 YYYY-MM-DD 日期字符串（带缓存，工具调用中同一日期会被反复解析）"""
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+@lru_cache(maxsize=256)
+def _parse_clock(time_str: str) -> Time:
+    """解析 HH:MM 时间字符串（带缓存，默认的偏好时间无需重复解析）"""
+    return datetime.strptime(time_str, "%H:%M").time()
+
+
+# ISO 时间字符串解析（带缓存）
+_parse_iso = lru_cache(maxsize=8192)(datetime.fromisoformat)
+
+# 时间段 ID 解析（带缓存）
+_parse_uuid = lru_cache(maxsize=4096)(UUID)
+
+
+def _find_free_gaps(
+    busy: List[Tuple[int, int]], window_start: int, window_end: int, need: int
+) -> List[Tuple[int, int]]:
+    """
+    在忙碌区间之间查找足够长的空闲时间
+
+    Args:
+        busy: 按开始时间排序的忙碌区间 (开始, 结束)，单位为秒
+        window_start: 偏好时间范围的开始
+        window_end: 偏好时间范围的结束
+        need: 需要的空闲时长
+
+    Returns:
+        List[Tuple[int, int]]: 空闲时间的 (开始, 可用时长) 列表
+    """
+    gaps = []
+    current = window_start
+
+    for start, end in busy:
+        # 之后的空闲时间已超出偏好时间范围，无需继续扫描
+        if current + need > window_end:
+            break
+
+        # 检查当前时间到下一个时间段开始之间是否有足够的空闲时间
+        if start > current and start - current >= need:
+            gaps.append((current, start - current))
+        current = max(current, end)
+
+    # 检查最后一个时间段之后是否还有空闲时间
+    if current < window_end and window_end - current >= need:
+        gaps.append((current, window_end - current))
+
+    return gaps
+
+
+def _format_seconds(seconds: int) -> str:
+    """将相对当天零点的秒数格式化为 HH:MM"""
+    hours, minutes = divmod(seconds // 60 % (24 * 60), 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+
+class TimeManagementAgent:
+    """时间管理 AI Agent - 核心智能规划助手"""
+
+    # 已注册工具的 PydanticAI Agent，工具的 JSON Schema 只在首次创建实例时生成
+    _shared_agent: Optional[Agent] = None
+
+    def __init__(self):
+        """初始化时间管理 Agent"""
 
-        @self.agent.tool
+        # 初始化 AI 模型
+        self.model = OpenAIModel(
+            model_name="deepseek-chat",
+            provider=OpenAIProvider(
+                base_url=_DEEPSEEK_CONFIG.base_url, api_key=_DEEPSEEK_CONFIG.api_key
+            ),
+        )
+
+        # 初始化 DeepSeek 客户端（用于多轮对话）
+        self.deepseek_client = AsyncOpenAI(
+            api_key=_DEEPSEEK_CONFIG.api_key, base_url=_DEEPSEEK_CONFIG.base_url
+        )
+
+        # DeepSeek 多轮对话消息历史
+        self.conversation_messages = []
+
+        # 初始化服务组件
+        self.slot_service = TimeSlotService()
+        self.schedule_service = ScheduleService(self.slot_service)
+        self.planning_service = PlanningService(self.schedule_service)
+
+        # 初始化简化的 MCP 客户端
+        self.mcp_client = SimpleMCPClient()
+        self.thinking_client: Optional[SimpleMCPClient] = None
+
+        # 初始化对话记忆管理器
+        self.memory = ConversationMemory(
+            memory_file="conversation_memory.jsonl",
+            max_recent_messages=15,  # 保留最近15条消息
+            max_total_messages=80,  # 总共最多80条消息
+            summary_threshold=40,  # 40条消息后开始摘要
+        )
+
+        # PydanticAI Agent（用于工具调用），所有实例共用；
+        # 工具通过 ctx.deps 访问实例，调用 self.agent.run(...) 时须传入 deps=self
+        self.agent = self._get_shared_agent(self.model)
+
+        logger.info("时间管理 Agent 初始化完成")
+
+    @classmethod
+    def _get_shared_agent(cls, model: OpenAIModel) -> Agent:
+        """获取共用的 PydanticAI Agent，首次调用时创建并注册工具"""
+        if cls._shared_agent is None:
+            agent = Agent(
+                model=model,
+                deps_type=cls,
+                system_prompt=SYSTEM_PROMPT,
+                retries=2,
+            )
+            cls._register_tools(agent)
+            cls._shared_agent = agent
+        return cls._shared_agent
+
+    def initialize(self) -> bool:
+        """初始化 Agent（启动 MCP 服务等）"""
+        try:
+            # 尝试初始化简化的 MCP 客户端
+            logger.info("正在初始化 MCP 服务...")
+            if self.mcp_client.start_and_initialize():
+                self.thinking_client = self.mcp_client
+                logger.info("MCP 思维链服务已启用")
+            else:
+                logger.warning("MCP 服务初始化失败，将以基础模式运行")
+                self.thinking_client = None
+
+            logger.info("Agent 初始化完成")
+            return True
+
+        except Exception as e:
+            logger.warning(f"MCP 服务初始化失败: {e}，将以基础模式运行")
+            self.thinking_client = None
+            return True  # 即使 MCP 失败，Agent 仍可工作
+
+    def shutdown(self):
+        """关闭 Agent"""
+        if self.mcp_client:
+            self.mcp_client.stop()
+        logger.info("Agent 已关闭")
+
+    def _get_system_prompt(self) -> str:
+        """获取系统提示词"""
+        return SYSTEM_PROMPT
+
+    @staticmethod
+    def _register_tools(agent: Agent):
+        """
+        注册 Agent 可用的工具
+
+        工具通过 ctx.deps 访问调用方的 TimeManagementAgent 实例，不绑定具体实例，
+        因此所有实例可共用同一个已注册工具的 PydanticAI Agent；
+        运行该 Agent 时须以 deps=<TimeManagementAgent 实例> 传入。
+
+        工具返回值由 PydanticAI 序列化，datetime/date 字段直接返回原始对象，
+        序列化时自动输出为 ISO 8601 字符串。
+        """
+
+        @agent.tool
         def parse_task_description(
-            ctx: RunContext[None], description: str
+            ctx: RunContext["TimeManagementAgent"], description: str
         ) -> Dict[str, Any]:
             """
             解析用户的任务描述，提取结构化信息
@@ -254,7 +449,6 @@ class TimeManagementAgent:
             }
 
             # 提取任务名称（简化实现）
-            words = description.split()
             if "学习" in description:
                 task_info["title"] = "学习任务"
                 task_info["task_type"] = "fixed"
@@ -273,40 +467,31 @@ class TimeManagementAgent:
                 )
 
             # 提取时长信息
-            for word in words:
-                if "小时" in word:
-                    try:
-                        hours = float(word.replace("小时", ""))
-                        task_info["duration_minutes"] = int(hours * 60)
-                    except ValueError:
-                        pass
-                elif "分钟" in word:
-                    try:
-                        minutes = int(word.replace("分钟", ""))
-                        task_info["duration_minutes"] = minutes
-                    except ValueError:
-                        pass
+            durations = _DURATION_PATTERN.findall(description)
+            if durations:
+                hours, minutes = durations[-1]
+                task_info["duration_minutes"] = (
+                    int(float(hours) * 60) if hours else int(minutes)
+                )
 
             # 提取优先级
-            if any(keyword in description for keyword in ["紧急", "急", "重要"]):
+            if _HIGH_PRIORITY_PATTERN.search(description):
                 task_info["priority"] = "high"
-            elif any(
-                keyword in description for keyword in ["低优先级", "不急", "有空时"]
-            ):
+            elif _LOW_PRIORITY_PATTERN.search(description):
                 task_info["priority"] = "low"
 
             # 提取时间相关信息
-            if any(keyword in description for keyword in ["明天", "下周", "后天"]):
+            if _FUTURE_DEADLINE_PATTERN.search(description):
                 task_info["deadline"] = "未来几天"
-            elif any(keyword in description for keyword in ["今天", "现在", "马上"]):
+            elif _TODAY_DEADLINE_PATTERN.search(description):
                 task_info["deadline"] = "今天"
 
             logger.info(f"任务解析结果: {task_info}")
             return task_info
 
-        @self.agent.tool
+        @agent.tool
         def create_time_slot(
-            ctx: RunContext[None],
+            ctx: RunContext["TimeManagementAgent"],
             title: str,
             start_time: str,
             duration_minutes: int,
@@ -327,15 +512,13 @@ class TimeManagementAgent:
                 Dict[str, Any]: 创建结果
             """
             try:
-                start_dt = datetime.fromisoformat(start_time)
+                start_dt = _parse_iso(start_time)
                 end_dt = start_dt + timedelta(minutes=duration_minutes)
 
-                task_type_enum = (
-                    TaskType.FIXED if task_type == "fixed" else TaskType.FLEXIBLE
-                )
-                priority_enum = getattr(Priority, priority.upper(), Priority.MEDIUM)
+                task_type_enum = _TASK_TYPE.get(task_type, TaskType.FLEXIBLE)
+                priority_enum = _to_priority(priority)
 
-                slot = self.slot_service.create_slot(
+                slot = ctx.deps.slot_service.create_slot(
                     title=title,
                     start_time=start_dt,
                     end_time=end_dt,
@@ -353,9 +536,9 @@ class TimeManagementAgent:
                 logger.error(f"创建时间段失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
+        @agent.tool
         def query_schedule(
-            ctx: RunContext[None], start_date: str, end_date: str
+            ctx: RunContext["TimeManagementAgent"], start_date: str, end_date: str
         ) -> Dict[str, Any]:
             """
             查询指定日期范围的日程安排
@@ -368,10 +551,14 @@ class TimeManagementAgent:
                 Dict[str, Any]: 查询结果
             """
             try:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+                start_dt = _parse_day(start_date)
+                end_dt = _parse_day(end_date) + timedelta(days=1)
+
+                # 日期校验通过后，尚未创建任何时间段时无需查询
+                if not ctx.deps.slot_service.slots:
+                    return {"success": True, "total_slots": 0, "slots": []}
 
-                slots = self.schedule_service.query_slots_by_range(start_dt, end_dt)
+                slots = ctx.deps.schedule_service.query_slots_by_range(start_dt, end_dt)
 
                 result = {"success": True, "total_slots": len(slots), "slots": []}
 
@@ -380,8 +567,8 @@ class TimeManagementAgent:
                         {
                             "id": str(slot.id),
                             "title": slot.title,
-                            "start_time": slot.start_time.isoformat(),
-                            "end_time": slot.end_time.isoformat(),
+                            "start_time": slot.start_time,
+                            "end_time": slot.end_time,
                             "duration_minutes": slot.duration_minutes,
                             "task_type": slot.task_type.value,
                             "priority": slot.priority.value,
@@ -394,9 +581,9 @@ class TimeManagementAgent:
                 logger.error(f"查询日程失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
+        @agent.tool
         def generate_daily_plan(
-            ctx: RunContext[None],
+            ctx: RunContext["TimeManagementAgent"],
             target_date: str,
             tasks: List[Dict[str, Any]],
             user_preferences: Dict[str, Any],
@@ -413,58 +600,54 @@ class TimeManagementAgent:
                 Dict[str, Any]: 生成的计划
             """
             try:
-                date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
+                date_obj = _parse_day(target_date).date()
 
                 # 创建用户偏好对象
                 preferences = UserPreferences(**user_preferences)
 
                 # 将任务字典转换为 TimeSlot 对象
-                task_slots = []
-                for task in tasks:
-                    slot = TimeSlot(
+                task_slots = [
+                    TimeSlot(
                         title=task["title"],
-                        start_time=datetime.fromisoformat(task["start_time"]),
-                        end_time=datetime.fromisoformat(task["end_time"]),
+                        start_time=_parse_iso(task["start_time"]),
+                        end_time=_parse_iso(task["end_time"]),
                         task_type=TaskType(task.get("task_type", "flexible")),
                         priority=Priority(task.get("priority", "medium")),
                     )
-                    task_slots.append(slot)
+                    for task in tasks
+                ]
 
                 # 生成日程计划
-                day_schedule = self.planning_service.generate_daily_plan(
+                day_schedule = ctx.deps.planning_service.generate_daily_plan(
                     target_date=date_obj, tasks=task_slots, preferences=preferences
                 )
 
                 # 转换为返回格式
-                result = {
+                return {
                     "success": True,
                     "date": target_date,
                     "total_duration": day_schedule.total_duration,
                     "free_time": day_schedule.free_time,
-                    "slots": [],
-                }
-
-                for slot in day_schedule.slots:
-                    result["slots"].append(
+                    "slots": [
                         {
                             "id": str(slot.id),
                             "title": slot.title,
-                            "start_time": slot.start_time.isoformat(),
-                            "end_time": slot.end_time.isoformat(),
+                            "start_time": slot.start_time,
+                            "end_time": slot.end_time,
                             "task_type": slot.task_type.value,
                             "priority": slot.priority.value,
                         }
-                    )
-
-                return result
+                        for slot in day_schedule.slots
+                    ],
+                }
 
             except Exception as e:
                 logger.error(f"生成日程计划失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
+        @agent.tool
         def create_time_schedule_from_description(
-            ctx: RunContext[None],
+            ctx: RunContext["TimeManagementAgent"],
             user_request: str,
             target_date: str = None,
             user_preferences: Dict[str, Any] = None,
@@ -487,96 +670,29 @@ class TimeManagementAgent:
                 if target_date is None:
                     target_date = datetime.now().strftime("%Y-%m-%d")
 
-                # 解析用户请求中的时间安排
-                import re
-                from datetime import datetime, time
-
                 created_slots = []
 
-                # 提取时间和任务信息
-                time_patterns = [
-                    r"(\d{1,2})[点:](\d{0,2})\s*(?:左右|大概)?\s*(.+?)(?=，|。|$|，)",
-                    r"(晚上|上午|下午|中午)\s*(.+?)(?=，|。|$)",
-                    r"(.+?)\s*大概\s*(\d+)\s*(小时|分钟)",
+                # 解析具体的时间安排：描述中包含规则的全部关键词时套用对应模板
+                time_slots_to_create = [
+                    {**template, "start_time": f"{target_date}T{start_time}:00"}
+                    for keywords, start_time, template in _SCHEDULE_RULES
+                    if all(keyword in user_request for keyword in keywords)
                 ]
 
-                # 预设的时间安排（基于用户描述）
-                time_slots_to_create = []
-
-                # 解析具体的时间安排
-                if "五点左右去吃饭" in user_request:
-                    time_slots_to_create.append(
-                        {
-                            "title": "吃饭",
-                            "start_time": f"{target_date}T17:00:00",
-                            "duration_minutes": 30,
-                            "task_type": "fixed",
-                            "priority": "medium",
-                        }
-                    )
-
-                if "休息一下" in user_request and "吃完" in user_request:
-                    time_slots_to_create.append(
-                        {
-                            "title": "休息",
-                            "start_time": f"{target_date}T17:30:00",
-                            "duration_minutes": 30,
-                            "task_type": "flexible",
-                            "priority": "low",
-                        }
-                    )
-
-                if "洗个澡" in user_request and "一个小时" in user_request:
-                    time_slots_to_create.append(
-                        {
-                            "title": "洗澡",
-                            "start_time": f"{target_date}T18:00:00",
-                            "duration_minutes": 60,
-                            "task_type": "fixed",
-                            "priority": "medium",
-                        }
-                    )
-
-                if "敲代码" in user_request and "一个小时以上" in user_request:
-                    time_slots_to_create.append(
-                        {
-                            "title": "敲代码",
-                            "start_time": f"{target_date}T19:00:00",
-                            "duration_minutes": 90,  # 1.5小时
-                            "task_type": "fixed",
-                            "priority": "high",
-                        }
-                    )
-
-                if "玩游戏" in user_request:
-                    time_slots_to_create.append(
-                        {
-                            "title": "玩游戏",
-                            "start_time": f"{target_date}T20:30:00",
-                            "duration_minutes": 60,
-                            "task_type": "flexible",
-                            "priority": "low",
-                        }
-                    )
-
                 # 创建时间段
                 for slot_data in time_slots_to_create:
                     try:
-                        start_dt = datetime.fromisoformat(slot_data["start_time"])
+                        start_dt = _parse_iso(slot_data["start_time"])
                         end_dt = start_dt + timedelta(
                             minutes=slot_data["duration_minutes"]
                         )
 
-                        task_type_enum = (
-                            TaskType.FIXED
-                            if slot_data["task_type"] == "fixed"
-                            else TaskType.FLEXIBLE
-                        )
-                        priority_enum = getattr(
-                            Priority, slot_data["priority"].upper(), Priority.MEDIUM
+                        task_type_enum = _TASK_TYPE.get(
+                            slot_data["task_type"], TaskType.FLEXIBLE
                         )
+                        priority_enum = _to_priority(slot_data["priority"])
 
-                        slot = self.slot_service.create_slot(
+                        slot = ctx.deps.slot_service.create_slot(
                             title=slot_data["title"],
                             start_time=start_dt,
                             end_time=end_dt,
@@ -618,9 +734,9 @@ class TimeManagementAgent:
                     "message": "创建时间安排失败",
                 }
 
-        @self.agent.tool
+        @agent.tool
         def update_time_slot(
-            ctx: RunContext[None],
+            ctx: RunContext["TimeManagementAgent"],
             slot_id: str,
             title: str = None,
             start_time: str = None,
@@ -644,10 +760,8 @@ class TimeManagementAgent:
             """
             try:
                 # 查找现有时间段
-                from uuid import UUID
-
-                slot_uuid = UUID(slot_id)
-                slot = self.slot_service.get_slot(slot_uuid)
+                slot_uuid = _parse_uuid(slot_id)
+                slot = ctx.deps.slot_service.get_slot(slot_uuid)
 
                 if not slot:
                     return {"success": False, "error": f"时间段 {slot_id} 不存在"}
@@ -657,7 +771,7 @@ class TimeManagementAgent:
                 if title is not None:
                     update_data["title"] = title
                 if start_time is not None:
-                    start_dt = datetime.fromisoformat(start_time)
+                    start_dt = _parse_iso(start_time)
                     update_data["start_time"] = start_dt
                     if duration_minutes is not None:
                         update_data["end_time"] = start_dt + timedelta(
@@ -675,16 +789,16 @@ class TimeManagementAgent:
                     )
 
                 if task_type is not None:
-                    update_data["task_type"] = (
-                        TaskType.FIXED if task_type == "fixed" else TaskType.FLEXIBLE
+                    update_data["task_type"] = _TASK_TYPE.get(
+                        task_type, TaskType.FLEXIBLE
                     )
                 if priority is not None:
-                    update_data["priority"] = getattr(
-                        Priority, priority.upper(), Priority.MEDIUM
-                    )
+                    update_data["priority"] = _to_priority(priority)
 
                 # 执行更新
-                updated_slot = self.slot_service.update_slot(slot_uuid, **update_data)
+                updated_slot = ctx.deps.slot_service.update_slot(
+                    slot_uuid, **update_data
+                )
 
                 if updated_slot:
                     return {
@@ -707,8 +821,10 @@ class TimeManagementAgent:
                 logger.error(f"更新时间段失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
-        def delete_time_slot(ctx: RunContext[None], slot_id: str) -> Dict[str, Any]:
+        @agent.tool
+        def delete_time_slot(
+            ctx: RunContext["TimeManagementAgent"], slot_id: str
+        ) -> Dict[str, Any]:
             """
             删除指定的时间段
 
@@ -719,19 +835,17 @@ class TimeManagementAgent:
                 Dict[str, Any]: 删除结果
             """
             try:
-                from uuid import UUID
-
-                slot_uuid = UUID(slot_id)
+                slot_uuid = _parse_uuid(slot_id)
 
                 # 获取时间段信息（用于返回消息）
-                slot = self.slot_service.get_slot(slot_uuid)
+                slot = ctx.deps.slot_service.get_slot(slot_uuid)
                 if not slot:
                     return {"success": False, "error": f"时间段 {slot_id} 不存在"}
 
                 slot_title = slot.title
 
                 # 执行删除
-                success = self.slot_service.delete_slot(slot_uuid)
+                success = ctx.deps.slot_service.delete_slot(slot_uuid)
 
                 if success:
                     return {
@@ -746,9 +860,11 @@ class TimeManagementAgent:
                 logger.error(f"删除时间段失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
+        @agent.tool
         def list_all_time_slots(
-            ctx: RunContext[None], start_date: str = None, end_date: str = None
+            ctx: RunContext["TimeManagementAgent"],
+            start_date: str = None,
+            end_date: str = None,
         ) -> Dict[str, Any]:
             """
             列出所有时间段或指定日期范围内的时间段
@@ -761,44 +877,54 @@ class TimeManagementAgent:
                 Dict[str, Any]: 时间段列表
             """
             try:
+                date_range = None
                 if start_date and end_date:
+                    date_range = (
+                        _parse_day(start_date).date(),
+                        _parse_day(end_date).date(),
+                    )
+
+                # 日期校验通过后，尚未创建任何时间段时无需查询
+                if not ctx.deps.slot_service.slots:
+                    return {"success": True, "total_slots": 0, "slots": []}
+
+                if date_range:
                     # 查询指定日期范围
-                    start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
-                    end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
-                    slots = self.slot_service.find_slots_by_date_range(start_dt, end_dt)
+                    start_dt, end_dt = date_range
+                    slots = ctx.deps.slot_service.find_slots_by_date_range(
+                        start_dt, end_dt
+                    )
                 else:
                     # 查询所有时间段
-                    slots = list(self.slot_service.slots.values())
-
-                result = {"success": True, "total_slots": len(slots), "slots": []}
-
-                # 按开始时间排序
-                sorted_slots = sorted(slots, key=lambda x: x.start_time)
+                    slots = ctx.deps.slot_service.slots.values()
 
-                for slot in sorted_slots:
-                    result["slots"].append(
+                # 按开始时间排序，一次性构建结果列表
+                return {
+                    "success": True,
+                    "total_slots": len(slots),
+                    "slots": [
                         {
                             "id": str(slot.id),
                             "title": slot.title,
-                            "start_time": slot.start_time.isoformat(),
-                            "end_time": slot.end_time.isoformat(),
+                            "start_time": slot.start_time,
+                            "end_time": slot.end_time,
                             "duration_minutes": slot.duration_minutes,
                             "task_type": slot.task_type.value,
                             "priority": slot.priority.value,
-                            "date": slot.start_time.strftime("%Y-%m-%d"),
-                            "time_range": f"{slot.start_time.strftime('%H:%M')}-{slot.end_time.strftime('%H:%M')}",
+                            "date": slot.start_time.date(),
+                            "time_range": f"{slot.start_time:%H:%M}-{slot.end_time:%H:%M}",
                         }
-                    )
-
-                return result
+                        for slot in sorted(slots, key=_slot_start)
+                    ],
+                }
 
             except Exception as e:
                 logger.error(f"列出时间段失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
+        @agent.tool
         def find_free_time_slots(
-            ctx: RunContext[None],
+            ctx: RunContext["TimeManagementAgent"],
             target_date: str,
             duration_minutes: int,
             prefer_time_start: str = "09:00",
@@ -817,64 +943,44 @@ class TimeManagementAgent:
                 Dict[str, Any]: 空闲时间段列表
             """
             try:
-                date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
+                day_start = _parse_day(target_date)
+                date_obj = day_start.date()
 
                 # 获取当天的所有时间段
-                existing_slots = self.slot_service.find_slots_by_date_range(
+                existing_slots = ctx.deps.slot_service.find_slots_by_date_range(
                     date_obj, date_obj
                 )
 
                 # 构建偏好时间范围
-                prefer_start = datetime.strptime(
-                    f"{target_date} {prefer_time_start}", "%Y-%m-%d %H:%M"
+                prefer_start = datetime.combine(
+                    date_obj, _parse_clock(prefer_time_start)
                 )
-                prefer_end = datetime.strptime(
-                    f"{target_date} {prefer_time_end}", "%Y-%m-%d %H:%M"
+                prefer_end = datetime.combine(date_obj, _parse_clock(prefer_time_end))
+
+                # 时间统一换算为相对当天零点的秒数，按开始时间排序后扫描
+                def to_seconds(dt: datetime) -> int:
+                    return int((dt - day_start).total_seconds())
+
+                busy = sorted(
+                    (to_seconds(slot.start_time), to_seconds(slot.end_time))
+                    for slot in existing_slots
                 )
 
                 # 查找空闲时间段
-                free_slots = []
-                current_time = prefer_start
-
-                # 按开始时间排序现有时间段
-                sorted_slots = sorted(existing_slots, key=lambda x: x.start_time)
-
-                for slot in sorted_slots:
-                    # 检查当前时间到下一个时间段开始之间是否有足够的空闲时间
-                    if slot.start_time > current_time:
-                        gap_duration = (
-                            slot.start_time - current_time
-                        ).total_seconds() / 60
-                        if gap_duration >= duration_minutes:
-                            free_slots.append(
-                                {
-                                    "start_time": current_time.strftime("%H:%M"),
-                                    "end_time": (
-                                        current_time
-                                        + timedelta(minutes=duration_minutes)
-                                    ).strftime("%H:%M"),
-                                    "duration_minutes": duration_minutes,
-                                    "available_duration": int(gap_duration),
-                                }
-                            )
-                    current_time = max(current_time, slot.end_time)
-
-                # 检查最后一个时间段之后是否还有空闲时间
-                if current_time < prefer_end:
-                    remaining_duration = (
-                        prefer_end - current_time
-                    ).total_seconds() / 60
-                    if remaining_duration >= duration_minutes:
-                        free_slots.append(
-                            {
-                                "start_time": current_time.strftime("%H:%M"),
-                                "end_time": (
-                                    current_time + timedelta(minutes=duration_minutes)
-                                ).strftime("%H:%M"),
-                                "duration_minutes": duration_minutes,
-                                "available_duration": int(remaining_duration),
-                            }
-                        )
+                free_slots = [
+                    {
+                        "start_time": _format_seconds(gap_start),
+                        "end_time": _format_seconds(gap_start + duration_minutes * 60),
+                        "duration_minutes": duration_minutes,
+                        "available_duration": available // 60,
+                    }
+                    for gap_start, available in _find_free_gaps(
+                        busy,
+                        to_seconds(prefer_start),
+                        to_seconds(prefer_end),
+                        duration_minutes * 60,
+                    )
+                ]
 
                 return {
                     "success": True,
@@ -888,9 +994,9 @@ class TimeManagementAgent:
                 logger.error(f"查找空闲时间失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
+        @agent.tool
         def search_conversation_history(
-            ctx: RunContext[None], keyword: str, limit: int = 5
+            ctx: RunContext["TimeManagementAgent"], keyword: str, limit: int = 5
         ) -> Dict[str, Any]:
             """
             搜索对话历史记录
@@ -903,7 +1009,7 @@ class TimeManagementAgent:
                 Dict[str, Any]: 搜索结果
             """
             try:
-                messages = self.memory.search_history(keyword, limit)
+                messages = ctx.deps.memory.search_history(keyword, limit)
 
                 results = []
                 for msg in messages:
@@ -931,8 +1037,10 @@ class TimeManagementAgent:
                 logger.error(f"搜索对话历史失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
-        def get_conversation_summary(ctx: RunContext[None]) -> Dict[str, Any]:
+        @agent.tool
+        def get_conversation_summary(
+            ctx: RunContext["TimeManagementAgent"],
+        ) -> Dict[str, Any]:
             """
             获取对话摘要和统计信息
 
@@ -940,11 +1048,11 @@ class TimeManagementAgent:
                 Dict[str, Any]: 对话摘要信息
             """
             try:
-                stats = self.memory.get_memory_stats()
+                stats = ctx.deps.memory.get_memory_stats()
 
                 return {
                     "success": True,
-                    "conversation_summary": self.memory.conversation_summary,
+                    "conversation_summary": ctx.deps.memory.conversation_summary,
                     "statistics": stats,
                     "recent_important_topics": [
                         (
@@ -952,7 +1060,7 @@ class TimeManagementAgent:
                             if len(msg.content) > 100
                             else msg.content
                         )
-                        for msg in self.memory.get_important_context()[-5:]
+                        for msg in ctx.deps.memory.get_important_context()[-5:]
                     ],
                 }
 
@@ -960,9 +1068,9 @@ class TimeManagementAgent:
                 logger.error(f"获取对话摘要失败: {e}")
                 return {"success": False, "error": str(e)}
 
-        @self.agent.tool
+        @agent.tool
         def get_user_info(
-            ctx: RunContext[None], query: str = "用户名字"
+            ctx: RunContext["TimeManagementAgent"], query: str = "用户名字"
         ) -> Dict[str, Any]:
             """
             从记忆中获取用户信息，如姓名、偏好等
@@ -977,23 +1085,16 @@ class TimeManagementAgent:
                 # 搜索相关的对话历史
                 if "名字" in query or "姓名" in query:
                     # 从最近的记忆中查找名字信息
-                    recent_context = self.memory.get_structured_context(max_messages=10)
+                    recent_context = ctx.deps.memory.get_structured_context(
+                        max_messages=10
+                    )
 
                     for msg in reversed(recent_context):  # 从最新的开始查找
                         if msg["type"] == "user":
                             content = msg["content"]
                             # 使用多种模式匹配名字
-                            import re
-
-                            name_patterns = [
-                                r"我叫(.+?)(?:，|。|$)",
-                                r"我的名字(?:是|叫)(.+?)(?:，|。|$)",
-                                r"我是(.+?)(?:，|。|$)",
-                                r"叫我(.+?)(?:，|。|$)",
-                            ]
-
-                            for pattern in name_patterns:
-                                match = re.search(pattern, content)
+                            for pattern in _NAME_PATTERNS:
+                                match = pattern.search(content)
                                 if match:
                                     name = match.group(1).strip()
                                     return {
@@ -1046,44 +1147,42 @@ class TimeManagementAgent:
 
             # 如果是第一次对话，初始化系统消息
             if not self.conversation_messages:
-                # 构建增强的系统提示词
-                base_system_prompt = self._get_system_prompt()
+                # 记忆相关内容单独作为第二条系统消息，固定的系统提示词保持在最前面
                 user_profile = self.memory.get_user_profile_context()
                 conversation_context = self.memory.get_conversation_context_for_ai(
                     max_messages=10
                 )
 
-                enhanced_system_content = base_system_prompt
+                memory_content = ""
 
                 # 添加用户关键信息
                 if any(user_profile.values()):
-                    enhanced_system_content += "\n\n🙋‍♂️ 用户关键信息："
+                    memory_content += "🙋‍♂️ 用户关键信息："
                     if user_profile["name"]:
-                        enhanced_system_content += f"\n- 姓名: {user_profile['name']}"
+                        memory_content += f"\n- 姓名: {user_profile['name']}"
                     if user_profile["age"]:
-                        enhanced_system_content += f"\n- 年龄: {user_profile['age']}岁"
+                        memory_content += f"\n- 年龄: {user_profile['age']}岁"
                     if user_profile["occupation"]:
-                        enhanced_system_content += (
-                            f"\n- 职业: {user_profile['occupation']}"
-                        )
+                        memory_content += f"\n- 职业: {user_profile['occupation']}"
 
                 # 添加历史对话上下文
                 if conversation_context:
-                    enhanced_system_content += conversation_context
+                    memory_content += conversation_context
 
                 # 添加关键提醒
-                enhanced_system_content += "\n\n🎯 重要提醒：当用户询问个人信息时，请直接使用上面提供的信息回答，不要说'没有找到'或'无法获取'。"
+                memory_content += "\n\n🎯 重要提醒：当用户询问个人信息时，请直接使用上面提供的信息回答，不要说'没有找到'或'无法获取'。"
 
                 # 初始化对话历史
                 self.conversation_messages = [
-                    {"role": "system", "content": enhanced_system_content}
+                    {"role": "system", "content": self._get_system_prompt()},
+                    {"role": "system", "content": memory_content.lstrip()},
                 ]
 
             # 添加当前用户消息到对话历史
             self.conversation_messages.append({"role": "user", "content": user_input})
 
             # 调用DeepSeek API进行多轮对话
-            response = self.deepseek_client.chat.completions.create(
+            response = await self.deepseek_client.chat.completions.create(
                 model="deepseek-chat",
                 messages=self.conversation_messages,
                 max_tokens=4000,
@@ -1107,14 +1206,14 @@ class TimeManagementAgent:
 
             # 控制对话历史长度，保留系统消息和最近10轮对话
             if (
-                len(self.conversation_messages) > 21
-            ):  # 1 system + 20 messages (10轮对话)
+                len(self.conversation_messages) > 22
+            ):  # 2 system + 20 messages (10轮对话)
                 # 保留系统消息和最近的10轮对话
-                system_message = self.conversation_messages[0]
+                system_messages = self.conversation_messages[:2]
                 recent_messages = self.conversation_messages[
                     -20:
                 ]  # 最近20条消息(10轮对话)
-                self.conversation_messages = [system_message] + recent_messages
+                self.conversation_messages = system_messages + recent_messages
 
             # 添加助手回复到记忆
             importance = (
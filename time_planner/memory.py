@@ -3,6 +3,10 @@
 
 实现智能对话记忆功能，支持多层级记忆管理和持久化存储
 
+记忆以 JSONL 追加日志保存：每条消息一行，新增消息只追加一行；
+会话信息（摘要、会话开始时间）以 {"record": "session", ...} 记录保存，加载时以最后一条为准。
+只有清理旧消息或清空会话时才整体重写文件。
+
 作者：AI Assistant
 日期：2025-07-13
 """
@@ -15,6 +19,22 @@ from typing import List, Dict, Any, Optional
 from enum import Enum
 from loguru import logger
 
+try:
+    import orjson
+
+    def _dumps_line(record: Dict[str, Any]) -> bytes:
+        """编码为一行 JSON（含换行符）"""
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+    _loads = orjson.loads
+except ImportError:
+
+    def _dumps_line(record: Dict[str, Any]) -> bytes:
+        """编码为一行 JSON（含换行符）"""
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    _loads = json.loads
+
 
 class MessageType(str, Enum):
     """消息类型枚举"""
@@ -38,6 +58,9 @@ class MessageImportance(str, Enum):
 class ConversationMessage:
     """对话消息类"""
 
+    # 记忆中会保存大量消息，使用 __slots__ 省去每个实例的 __dict__
+    __slots__ = ("id", "timestamp", "content", "message_type", "importance", "metadata")
+
     def __init__(
         self,
         content: str,
@@ -82,7 +105,7 @@ class ConversationMemory:
 
     def __init__(
         self,
-        memory_file: str = "conversation_memory.json",
+        memory_file: str = "conversation_memory.jsonl",
         max_recent_messages: int = 20,
         max_total_messages: int = 100,
         summary_threshold: int = 50,
@@ -110,12 +133,16 @@ class ConversationMemory:
         """添加消息到记忆中"""
         message = ConversationMessage(content, message_type, importance, metadata)
         self.messages.append(message)
+        summary = self.conversation_summary
 
-        # 检查是否需要清理记忆
-        self._check_memory_cleanup()
-
-        # 保存到文件
-        self._save_memory()
+        # 检查是否需要清理记忆，清理了旧消息时整体重写文件
+        if self._check_memory_cleanup():
+            self._save_memory()
+        else:
+            records = [message.to_dict()]
+            if self.conversation_summary != summary:
+                records.append(self._session_record())
+            self._append_records(records)
 
         logger.debug(f"添加消息到记忆: {message_type.value} - {content[:50]}...")
 
@@ -191,13 +218,15 @@ class ConversationMemory:
         else:
             return MessageImportance.MEDIUM
 
-    def _check_memory_cleanup(self):
-        """检查是否需要清理记忆"""
+    def _check_memory_cleanup(self) -> bool:
+        """检查是否需要清理记忆，返回是否清理了旧消息"""
         if len(self.messages) > self.summary_threshold:
             self._create_summary()
 
         if len(self.messages) > self.max_total_messages:
             self._cleanup_old_messages()
+            return True
+        return False
 
     def _create_summary(self):
         """创建对话摘要"""
@@ -256,39 +285,107 @@ class ConversationMemory:
         """从文件加载记忆"""
         if os.path.exists(self.memory_file):
             try:
-                with open(self.memory_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                self.conversation_summary = data.get("summary", "")
-                self.session_start = datetime.fromisoformat(
-                    data.get("session_start", datetime.now().isoformat())
-                )
-
-                # 加载消息
                 self.messages = []
-                for msg_data in data.get("messages", []):
-                    self.messages.append(ConversationMessage.from_dict(msg_data))
+                # 逐行解析，单条损坏记录只跳过该行，不影响其余历史
+                offset = 0
+                bad_offset = None
+                with open(self.memory_file, "rb") as f:
+                    for line_no, line in enumerate(f, 1):
+                        line_start = offset
+                        offset += len(line)
+                        if not line.strip():
+                            continue
+                        try:
+                            record = _loads(line)
+                            if record.get("record") == "session":
+                                self._apply_session_record(record)
+                            else:
+                                self.messages.append(
+                                    ConversationMessage.from_dict(record)
+                                )
+                            bad_offset = None
+                        except Exception as e:
+                            logger.warning(f"跳过记忆文件第 {line_no} 行的损坏记录: {e}")
+                            bad_offset = line_start
+
+                if bad_offset is not None:
+                    # 末尾记录损坏（通常是追加写入中断），截掉以免后续追加续写在残行上
+                    with open(self.memory_file, "rb+") as f:
+                        f.truncate(bad_offset)
+                    logger.warning("已截断记忆文件末尾的不完整记录")
 
                 logger.debug(f"从文件加载了 {len(self.messages)} 条记忆")
 
             except Exception as e:
                 logger.error(f"加载记忆文件失败: {e}")
                 self.messages = []
+        elif self._load_legacy_memory():
+            # 旧版 JSON 记忆文件只在首次加载时转换一次
+            self._save_memory()
+            logger.info(f"已将旧版记忆文件转换为 {self.memory_file}")
         else:
             logger.info(f"对话记忆文件 {self.memory_file} 不存在，将创建新文件")
 
+    def _load_legacy_memory(self) -> bool:
+        """加载同名的旧版 .json 记忆文件，返回是否加载成功"""
+        legacy_file = os.path.splitext(self.memory_file)[0] + ".json"
+        if legacy_file == self.memory_file or not os.path.exists(legacy_file):
+            return False
+
+        try:
+            with open(legacy_file, "rb") as f:
+                data = _loads(f.read())
+
+            self._apply_session_record(data)
+            self.messages = [
+                ConversationMessage.from_dict(msg_data)
+                for msg_data in data.get("messages", [])
+            ]
+            return True
+
+        except Exception as e:
+            logger.error(f"加载旧版记忆文件失败: {e}")
+            self.messages = []
+            return False
+
+    def _apply_session_record(self, data: Dict[str, Any]):
+        """应用会话记录中的摘要和会话开始时间"""
+        self.conversation_summary = data.get("summary", "")
+        self.session_start = datetime.fromisoformat(
+            data.get("session_start", datetime.now().isoformat())
+        )
+
+    def _session_record(self) -> Dict[str, Any]:
+        """生成会话记录"""
+        return {
+            "record": "session",
+            "summary": self.conversation_summary,
+            "session_start": self.session_start.isoformat(),
+            "last_updated": datetime.now().isoformat(),
+        }
+
+    @staticmethod
+    def _encode_records(records: List[Dict[str, Any]]) -> bytes:
+        """将记录编码为 JSONL 内容"""
+        return b"".join(_dumps_line(record) for record in records)
+
+    def _append_records(self, records: List[Dict[str, Any]]):
+        """追加记录到记忆文件"""
+        try:
+            with open(self.memory_file, "ab") as f:
+                f.write(self._encode_records(records))
+
+        except Exception as e:
+            logger.error(f"保存记忆文件失败: {e}")
+
     def _save_memory(self):
-        """保存记忆到文件"""
+        """整体重写记忆文件（压缩追加日志）"""
         try:
-            data = {
-                "summary": self.conversation_summary,
-                "session_start": self.session_start.isoformat(),
-                "last_updated": datetime.now().isoformat(),
-                "messages": [msg.to_dict() for msg in self.messages],
-            }
+            records = [self._session_record()]
+            records.extend(msg.to_dict() for msg in self.messages)
 
-            with open(self.memory_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(self.memory_file, "wb") as f:
+                f.write(self._encode_records(records))
 
         except Exception as e:
             logger.error(f"保存记忆文件失败: {e}")
@@ -394,3 +491,4 @@ class ConversationMemory:
                         break
 
         return profile
+
@@ -9,6 +9,7 @@
 
 import os
 import json
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
@@ -25,6 +26,16 @@ from .memory import ConversationMemory, MessageType, MessageImportance
 # 加载环境变量
 load_dotenv()
 
+# 当前请求中调用过的工具名称（按请求隔离，并发请求之间互不影响）
+TOOLS_USED: ContextVar[Tuple[str, ...]] = ContextVar("tools_used", default=())
+
+
+def _record_tool(tool_name: str):
+    """记录当前请求调用的工具"""
+    tools = TOOLS_USED.get()
+    if tool_name not in tools:
+        TOOLS_USED.set(tools + (tool_name,))
+
 
 class NewTimeManagementAgent:
     """新的时间管理 AI Agent"""
@@ -56,7 +67,7 @@ class NewTimeManagementAgent:
 
         # 初始化对话记忆管理器
         self.memory = ConversationMemory(
-            memory_file="conversation_memory.json",
+            memory_file="conversation_memory.jsonl",
             max_recent_messages=15,
             max_total_messages=80,
             summary_threshold=40,
@@ -164,6 +175,7 @@ class NewTimeManagementAgent:
         """处理用户请求 - 使用DeepSeek多轮对话和JSON输出"""
 
         logger.info(f"处理用户请求: {user_input}")
+        TOOLS_USED.set(())
 
         try:
             # 添加用户消息到记忆
@@ -447,6 +459,7 @@ JSON格式示例：
             with open(latest_filename, "w", encoding="utf-8") as f:
                 json.dump(schedule_data, f, ensure_ascii=False, indent=2)
 
+            _record_tool("save_ai_generated_schedule")
             logger.info(f"AI生成的时间表已保存到: {filename}")
             logger.info(f"最新时间表已更新: {latest_filename}")
 
@@ -478,6 +491,7 @@ JSON格式示例：
                             results.append(
                                 f"✓ 日任务 '{task_data.get('task_name')}' 已添加"
                             )
+                            _record_tool("add_daily_task")
 
             # 处理周任务
             if "weekly_schedule" in json_data:
@@ -500,6 +514,7 @@ JSON格式示例：
                             results.append(
                                 f"✓ 周任务 '{task_data.get('task_name')}' 已添加"
                             )
+                            _record_tool("add_weekly_task")
 
             # 处理其他格式的任务数据（兼容旧格式）
             for key, value in json_data.items():
@@ -526,6 +541,7 @@ JSON格式示例：
                                     results.append(
                                         f"✓ 日任务 '{item.get('task_name')}' 已添加"
                                     )
+                                    _record_tool("add_daily_task")
                             elif "priority" in item or "belong_to_week" in item:
                                 # 周任务
                                 current_time = self.time_service.get_current_time_info()
@@ -546,6 +562,7 @@ JSON格式示例：
                                     results.append(
                                         f"✓ 周任务 '{item.get('task_name')}' 已添加"
                                     )
+                                    _record_tool("add_weekly_task")
 
             return (
                 "\\n".join(results) if results else "操作完成，但没有具体任务被处理。"
@@ -561,14 +578,17 @@ JSON格式示例：
 
     def get_detailed_time_info(self) -> Dict[str, Any]:
         """获取详细的当前时间信息（工具函数）"""
+        _record_tool("get_detailed_time_info")
         return self.time_service.get_detailed_time_info()
 
     def get_time_until_next_period(self) -> Dict[str, Any]:
         """获取距离下一个时间段的剩余时间（工具函数）"""
+        _record_tool("get_time_until_next_period")
         return self.time_service.get_time_until_next_period()
 
     def get_week_progress(self) -> Dict[str, Any]:
         """获取本周进度信息（工具函数）"""
+        _record_tool("get_week_progress")
         return self.time_service.get_week_progress()
 
     def get_date_info(self, date_str: str) -> Dict[str, Any]:
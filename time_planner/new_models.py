@@ -194,9 +194,9 @@ class TimeUtils:
             return "Invalid date range"
 
     @staticmethod
-    def get_current_datetime() -> Dict[str, Any]:
-        """获取当前时间信息"""
-        now = datetime.now()
+    def get_current_datetime(now: Optional[datetime] = None) -> Dict[str, Any]:
+        """获取当前时间信息（可传入 now 以复用同一时刻）"""
+        now = now or datetime.now()
         return {
             "current_date": now.strftime("%Y-%m-%d"),
             "current_time": now.strftime("%H:%M"),
@@ -209,9 +209,9 @@ class TimeUtils:
         }
 
     @staticmethod
-    def get_detailed_time_info() -> Dict[str, Any]:
-        """获取详细的当前时间信息"""
-        now = datetime.now()
+    def get_detailed_time_info(now: Optional[datetime] = None) -> Dict[str, Any]:
+        """获取详细的当前时间信息（可传入 now 以复用同一时刻）"""
+        now = now or datetime.now()
 
         # 获取时间段描述
         hour = now.hour
@@ -318,9 +318,9 @@ class TimeUtils:
         }
 
     @staticmethod
-    def get_week_progress() -> Dict[str, Any]:
-        """获取本周进度信息"""
-        now = datetime.now()
+    def get_week_progress(now: Optional[datetime] = None) -> Dict[str, Any]:
+        """获取本周进度信息（可传入 now 以复用同一时刻）"""
+        now = now or datetime.now()
 
         # 获取本周的开始和结束
         days_since_monday = now.weekday()
@@ -344,6 +344,20 @@ class TimeUtils:
             "hours_remaining": round((total_seconds - elapsed_seconds) / 3600, 1),
         }
 
+    @staticmethod
+    def snapshot() -> Dict[str, Any]:
+        """
+        获取当前时间快照
+
+        只取一次当前时间，同时生成当前时间、详细时间和本周进度三种信息。
+        """
+        now = datetime.now()
+        return {
+            "current_time": TimeUtils.get_current_datetime(now),
+            "detailed_time": TimeUtils.get_detailed_time_info(now),
+            "week_progress": TimeUtils.get_week_progress(now),
+        }
+
     @staticmethod
     def get_current_millisecond() -> int:
         """获取当前时间的毫秒数（自1970年1月1日以来的毫秒数）"""
@@ -7,8 +7,11 @@
 日期：2025-07-13
 """
 
+import functools
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Any, Optional, Tuple, Union
 from loguru import logger
@@ -24,12 +27,30 @@ from .new_models import (
 )
 
 
+def _synchronized(method):
+    """在服务锁内执行方法，保证数据修改与落盘不被并发请求交错"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class TimeManagementService:
     """时间管理服务类"""
 
     def __init__(self, data_file: str = "time_management_data.json"):
         """初始化服务"""
         self.data_file = data_file
+        # 可重入锁：写接口在线程池中执行，修改数据与保存文件都需持有该锁
+        self._lock = threading.RLock()
+        # deferred_save 的嵌套层数，以及推迟期间是否有待保存的修改
+        self._defer_depth = 0
+        self._dirty = False
+        # 数据版本号，每次成功保存后递增，供上层缓存判断数据是否变化
+        self.version = 0
         self.data: TimeManagementData = self._load_data()
         logger.info(f"时间管理服务初始化完成，数据文件：{data_file}")
 
@@ -56,12 +77,40 @@ class TimeManagementService:
     def _save_data(self, data: Optional[TimeManagementData] = None):
         """保存数据到JSON文件"""
         save_data = data or self.data
-        try:
-            with open(self.data_file, "w", encoding="utf-8") as f:
-                json.dump(save_data.to_dict(), f, ensure_ascii=False, indent=2)
-            logger.debug("时间管理数据已保存")
-        except Exception as e:
-            logger.error(f"保存数据失败：{e}")
+        with self._lock:
+            if data is None and self._defer_depth:
+                self._dirty = True
+                return
+            try:
+                with open(self.data_file, "w", encoding="utf-8") as f:
+                    json.dump(save_data.to_dict(), f, ensure_ascii=False, indent=2)
+                self.version += 1
+                logger.debug("时间管理数据已保存")
+            except Exception as e:
+                logger.error(f"保存数据失败：{e}")
+
+    @contextmanager
+    def deferred_save(self):
+        """
+        批量修改时推迟保存
+
+        上下文内的修改只标记为待保存，退出时如有修改只写一次数据文件；
+        期间持有服务锁，其他线程的写操作需等待批量修改完成。
+        """
+        with self._lock:
+            self._defer_depth += 1
+            try:
+                yield self
+            finally:
+                self._defer_depth -= 1
+                if self._defer_depth == 0 and self._dirty:
+                    self._dirty = False
+                    self._save_data()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """在锁内导出当前数据的字典快照"""
+        with self._lock:
+            return self.data.to_dict()
 
     # ================== 时间工具方法 ==================
 
@@ -95,6 +144,7 @@ class TimeManagementService:
 
     # ================== 日程管理方法 ==================
 
+    @_synchronized
     def add_daily_task(
         self,
         task_name: str,
@@ -149,6 +199,7 @@ class TimeManagementService:
             logger.error(f"添加日任务失败：{e}")
             return False
 
+    @_synchronized
     def add_weekly_task(
         self,
         task_name: str,
@@ -226,6 +277,11 @@ class TimeManagementService:
         """获取指定周的计划"""
         return self.data.weekly_schedules.get(week_number)
 
+    def get_daily_tasks(self, date_str: str) -> List[DailyTask]:
+        """获取指定日期的任务列表"""
+        daily_schedule = self.get_daily_schedule(date_str)
+        return daily_schedule.tasks if daily_schedule else []
+
     def get_weekly_tasks(self, week_number: int) -> List[WeeklyTask]:
         """获取指定周的任务列表"""
         try:
@@ -260,6 +316,7 @@ class TimeManagementService:
             logger.error(f"获取日期范围日程失败：{e}")
             return {}
 
+    @_synchronized
     def remove_daily_task(self, date_str: str, task_name: str) -> bool:
         """删除日任务"""
         try:
@@ -281,6 +338,7 @@ class TimeManagementService:
             logger.error(f"删除日任务失败：{e}")
             return False
 
+    @_synchronized
     def remove_weekly_task(self, week_number: int, task_name: str) -> bool:
         """删除周任务"""
         try:
@@ -301,6 +359,7 @@ class TimeManagementService:
             logger.error(f"删除周任务失败：{e}")
             return False
 
+    @_synchronized
     def update_daily_task(
         self, date_str: str, task_name: str, updates: Dict[str, Any]
     ) -> bool:
@@ -328,6 +387,7 @@ class TimeManagementService:
             logger.error(f"更新日任务失败：{e}")
             return False
 
+    @_synchronized
     def update_weekly_task(
         self, week_number: int, task_name: str, updates: Dict[str, Any]
     ) -> bool:
@@ -392,7 +452,7 @@ class TimeManagementService:
 
         try:
             with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(self.data.to_dict(), f, ensure_ascii=False, indent=2)
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
             logger.info(f"成功导出数据到：{output_file}")
             return output_file
         except Exception as e: